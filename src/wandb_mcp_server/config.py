@@ -24,3 +24,8 @@ try:
     MAX_ACCUMULATED_BYTES: int = int(os.getenv("MAX_ACCUMULATED_BYTES", str(1024 * 1024 * 1024)))
 except (ValueError, TypeError):
     MAX_ACCUMULATED_BYTES: int = 1024 * 1024 * 1024  # 1GB
+
+# Optional comma-separated override for the order in which the Weave query builder runs
+# its filter handlers (e.g. "status,time_range"). Unknown keys are ignored and any keys
+# left out keep their default relative order after the listed ones.
+WANDB_QB_HANDLER_ORDER: str = os.getenv("WANDB_QB_HANDLER_ORDER", "")
@@ -12,6 +12,26 @@ from wandb_mcp_server.mcp_tools.tools_utils import track_tool_execution
 
 logger = get_rich_logger(__name__)
 
+# Filter keys sent in the CallsFilter payload rather than compiled into a query expression
+_DIRECT_FILTER_KEYS = frozenset(
+    {
+        "op_names",
+        "op_name",
+        "input_refs",
+        "output_refs",
+        "parent_ids",
+        "trace_ids",
+        "trace_id",
+        "call_ids",
+        "trace_roots_only",
+        "wb_user_ids",
+        "wb_run_ids",
+    }
+)
+
+# List-typed CallsFilter keys that are passed through as-is, wrapping scalars in a list
+_LIST_FILTER_KEYS = ("input_refs", "output_refs", "parent_ids", "call_ids", "wb_user_ids", "wb_run_ids")
+
 COUNT_WEAVE_TRACES_TOOL_DESCRIPTION = """Count Weave traces matching filters. Returns total count and root trace count.
 
 <when_to_use>
@@ -160,20 +180,6 @@ def count_traces(
         complex_filters_for_query_expr: Dict[str, Any] = {}
 
         if filters:
-            direct_filter_keys = {
-                "op_names",
-                "op_name",
-                "input_refs",
-                "output_refs",
-                "parent_ids",
-                "trace_ids",
-                "trace_id",
-                "call_ids",
-                "trace_roots_only",
-                "wb_user_ids",
-                "wb_run_ids",
-            }
-
             temp_op_names = []
             if "op_name" in filters:
                 temp_op_names.append(filters["op_name"])
@@ -198,14 +204,7 @@ def count_traces(
             if temp_trace_ids:
                 filter_payload["trace_ids"] = list(set(temp_trace_ids))
 
-            for key in [
-                "input_refs",
-                "output_refs",
-                "parent_ids",
-                "call_ids",
-                "wb_user_ids",
-                "wb_run_ids",
-            ]:
+            for key in _LIST_FILTER_KEYS:
                 if key in filters:
                     value = filters[key]
                     filter_payload[key] = [value] if not isinstance(value, list) else value
@@ -214,7 +213,7 @@ def count_traces(
                 filter_payload["trace_roots_only"] = filters["trace_roots_only"]
 
             for key, value in filters.items():
-                if key not in direct_filter_keys and key not in ["op_name", "trace_id"]:
+                if key not in _DIRECT_FILTER_KEYS:
                     complex_filters_for_query_expr[key] = value
 
         if filter_payload:
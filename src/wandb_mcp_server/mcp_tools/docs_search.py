@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import json
 import os
+from typing import Any
 
 import httpx
 
@@ -20,6 +21,8 @@ logger = get_rich_logger(__name__)
 DOCS_MCP_URL = "https://docs.wandb.ai/mcp"
 DOCS_SEARCH_TIMEOUT = 30
 
+_SSE_DATA_PREFIX = "data: "
+
 SEARCH_WANDB_DOCS_TOOL_DESCRIPTION = """Search official W&B documentation for API usage, code examples, and guides.
 
 <when_to_use>
@@ -43,6 +46,35 @@ def is_docs_proxy_enabled() -> bool:
     return os.environ.get("WANDB_MCP_PROXY_DOCS", "true").lower() != "false"
 
 
+def _first_sse_data(body: str) -> Any:
+    """Return the first JSON payload among the SSE ``data: `` lines of a response body, or None.
+
+    Scans with str.find from one ``data: `` line to the next instead of splitting the whole body
+    into lines, and stops at the first line that parses.
+    """
+    if body.startswith(_SSE_DATA_PREFIX):
+        line_start = 0
+    else:
+        line_start = body.find("\n" + _SSE_DATA_PREFIX)
+        if line_start < 0:
+            return None
+        line_start += 1
+
+    while True:
+        payload_start = line_start + len(_SSE_DATA_PREFIX)
+        line_end = body.find("\n", payload_start)
+        try:
+            return json.loads(body[payload_start:] if line_end < 0 else body[payload_start:line_end])
+        except json.JSONDecodeError:
+            pass
+        if line_end < 0:
+            return None
+        line_start = body.find("\n" + _SSE_DATA_PREFIX, line_end)
+        if line_start < 0:
+            return None
+        line_start += 1
+
+
 async def search_wandb_docs(query: str) -> str:
     """Proxy a search request to the W&B docs MCP server."""
     with track_tool_execution("search_wandb_docs", "n/a", {"query": query}) as ctx:
@@ -67,15 +99,7 @@ async def search_wandb_docs(query: str) -> str:
                 )
                 resp.raise_for_status()
 
-                body = resp.text
-                result = None
-                for line in body.split("\n"):
-                    if line.startswith("data: "):
-                        try:
-                            result = json.loads(line[6:])
-                            break
-                        except json.JSONDecodeError:
-                            continue
+                result = _first_sse_data(resp.text)
 
                 if not result:
                     result = resp.json()
@@ -36,10 +36,14 @@ str
 
 
 def query_wandbot_api(question: str) -> Dict[str, Any]:
-    with track_tool_execution(
-        "query_wandb_support_bot",
-        "n/a",
-        {"question": question},
+    # The status check and the query hit the same host, so one session reuses the connection
+    with (
+        track_tool_execution(
+            "query_wandb_support_bot",
+            "n/a",
+            {"question": question},
+        ),
+        requests.Session() as session,
     ):
         wandbot_base_url = os.getenv(
             "WANDBOT_BASE_URL", "https://weightsandbiases-wandbot--wandbot-api-wandbotapi-serve.modal.run"
@@ -50,7 +54,7 @@ def query_wandbot_api(question: str) -> Dict[str, Any]:
         STATUS_TIMEOUT_SECONDS = 20
 
         try:
-            status_response = requests.get(
+            status_response = session.get(
                 STATUS_ENDPOINT,
                 headers={"Accept": "application/json"},
                 timeout=STATUS_TIMEOUT_SECONDS,
@@ -74,7 +78,7 @@ def query_wandbot_api(question: str) -> Dict[str, Any]:
 
             if status_result["initialized"]:
                 try:
-                    response = requests.post(
+                    response = session.post(
                         QUERY_ENDPOINT,
                         headers={"Content-Type": "application/json"},
                         json={
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any, Dict, List, Optional
 
 from wandb_mcp_server.utils import get_rich_logger
@@ -335,13 +336,15 @@ def query_traces(
     This maintains the original signature of query_traces from query_weave.py,
     but delegates to our new implementation.
     """
-    service = get_trace_service()
+    # An explicit key skips the context lookup and the throwaway context-keyed service
     if api_key:
         service = TraceService(
             api_key=api_key,
             retries=retries,
             timeout=request_timeout,
         )
+    else:
+        service = get_trace_service()
 
     api = WandBApiManager.get_api()
     with track_tool_execution(
@@ -436,7 +439,7 @@ async def query_paginated_weave_traces(
     Args:
         entity_name: Weights & Biases entity name.
         project_name: Weights & Biands project name.
-        chunk_size: Number of traces to retrieve in each chunk.
+        chunk_size: Unused; traces are streamed from a single request. Kept for compatibility.
         filters: Dictionary of filter conditions.
         sort_by: Field to sort by.
         sort_direction: Sort direction ('asc' or 'desc').
@@ -455,12 +458,13 @@ async def query_paginated_weave_traces(
     Returns:
         QueryResult: A Pydantic model containing the query results
     """
-    service = get_trace_service()
     if api_key:
         service = TraceService(
             api_key=api_key,
             retries=retries,
         )
+    else:
+        service = get_trace_service()
 
     api = WandBApiManager.get_api()
     with track_tool_execution(
@@ -485,7 +489,10 @@ async def query_paginated_weave_traces(
             "debug_raw_traces": debug_raw_traces,
         },
     ):
-        result = service.query_paginated_traces(
+        # The trace service makes blocking HTTP calls (two passes for cost sorts), so it runs in a
+        # worker thread instead of stalling the event loop; to_thread carries the request context over
+        result = await asyncio.to_thread(
+            service.query_paginated_traces,
             entity_name=entity_name,
             project_name=project_name,
             chunk_size=chunk_size,
@@ -150,3 +150,37 @@ class WeaveApiClient:
         except Exception as e:
             logger.error(f"Unexpected error during HTTP request to Weave server: {e}")
             raise
+
+    def count_traces(self, query_params: Dict[str, Any]) -> int:
+        """Count the traces matching a query via the Weave stats endpoint.
+
+        Args:
+            query_params: Request body for /calls/query_stats (project_id plus optional filter and query).
+
+        Returns:
+            Number of matching traces.
+
+        Raises:
+            Exception: If the request fails.
+        """
+        url = f"{self.server_url}/calls/query_stats"
+        headers = {**self._get_auth_headers(), "Accept": "application/json"}
+
+        try:
+            response = self.session.post(
+                url,
+                headers=headers,
+                data=json.dumps(query_params),
+                timeout=self.timeout,
+            )
+            if response.status_code != 200:
+                error_msg = f"Error {response.status_code}: {response.text}"
+                logger.error(error_msg)
+                raise Exception(error_msg)
+            return response.json().get("count", 0)
+        except requests.RequestException as e:
+            logger.error(f"Error executing HTTP request to Weave stats endpoint: {e}")
+            raise Exception(f"Failed to count Weave traces due to network error: {e}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Error decoding JSON from Weave stats endpoint: {e}")
+            raise Exception(f"Failed to parse Weave API response: {e}")
@@ -17,6 +17,13 @@ from wandb_mcp_server.utils import get_rich_logger
 
 logger = get_rich_logger(__name__)
 
+# Key in each per-model summary.weave.costs entry that holds a given cost field
+_COST_ENTRY_KEYS = {
+    "total_cost": "total_cost",
+    "completion_cost": "completion_tokens_total_cost",
+    "prompt_cost": "prompt_tokens_total_cost",
+}
+
 
 class DateTimeEncoder(json.JSONEncoder):
     """JSON encoder that can handle datetime objects."""
@@ -539,6 +546,8 @@ class TraceProcessor:
     def get_cost(trace: Dict[str, Any], which_cost: str) -> float:
         """Extract cost information from a trace.
 
+        Reads the synthesized 'costs' column, falling back to summary.weave.costs.
+
         Args:
             trace: Trace dictionary.
             which_cost: Type of cost to extract ('total_cost', 'completion_cost', or 'prompt_cost').
@@ -546,22 +555,23 @@ class TraceProcessor:
         Returns:
             Cost value as a float.
         """
-        costs = trace.get("costs", {})
+        costs = trace.get("costs")
+        if costs is None:
+            # Raw API traces carry the breakdown under summary.weave.costs until 'costs' is synthesized
+            summary = trace.get("summary")
+            weave_summary = summary.get("weave") if isinstance(summary, dict) else None
+            costs = (weave_summary.get("costs") if isinstance(weave_summary, dict) else None) or {}
         total = 0.0
         found = False
 
+        # Resolve the cost field once rather than re-testing which_cost for every model entry
+        cost_key = _COST_ENTRY_KEYS.get(which_cost)
+
         for cost_info in costs.values():
             if not isinstance(cost_info, dict):
                 continue
 
-            if which_cost == "total_cost":
-                val = cost_info.get("total_cost")
-            elif which_cost == "completion_cost":
-                val = cost_info.get("completion_tokens_total_cost")
-            elif which_cost == "prompt_cost":
-                val = cost_info.get("prompt_tokens_total_cost")
-            else:
-                val = None
+            val = cost_info.get(cost_key) if cost_key is not None else None
 
             try:
                 if val is not None:
@@ -611,17 +621,20 @@ class TraceProcessor:
         return None
 
     @classmethod
-    def synthesize_fields(cls, trace: Dict[str, Any], requested_fields: List[str]) -> Dict[str, Any]:
+    def synthesize_fields(
+        cls, trace: Dict[str, Any], requested_fields: List[str], in_place: bool = False
+    ) -> Dict[str, Any]:
         """Synthesize additional fields in a trace.
 
         Args:
             trace: Trace dictionary.
             requested_fields: List of field names to synthesize.
+            in_place: Whether to update ``trace`` itself instead of a copy.
 
         Returns:
             Modified trace dictionary.
         """
-        result = trace.copy()
+        result = trace if in_place else trace.copy()
 
         if "status" in requested_fields and "status" not in trace:
             result["status"] = cls.extract_status(trace)
@@ -6,8 +6,12 @@ It separates the complex query construction logic from the API client.
 """
 
 import calendar
+import functools
+import sys
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
 
 # Import the query models for building complex queries
 from weave.trace_server.interface.query import (
@@ -15,6 +19,7 @@ from weave.trace_server.interface.query import (
     ContainsOperation,
     ContainsSpec,
     ConvertOperation,
+    ConvertSpec,
     EqOperation,
     GetFieldOperator,
     GteOperation,
@@ -26,6 +31,7 @@ from weave.trace_server.interface.query import (
     Query,
 )
 
+from wandb_mcp_server.config import WANDB_QB_HANDLER_ORDER
 from wandb_mcp_server.weave_api.models import (
     FilterOperator,
     QueryFilter,
@@ -35,6 +41,149 @@ from wandb_mcp_server.utils import get_rich_logger
 
 logger = get_rich_logger(__name__)
 
+# Sentinel for dict.get() lookups where a stored None must be told apart from a missing key
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=1024)
+def _iso_to_timestamp(dt_str: str) -> int:
+    """Parse an ISO datetime string into Unix seconds (cached, the mapping is pure).
+
+    Paginated and repeated queries usually carry identical ``time_range`` bounds,
+    so the parse only has to happen once per distinct string.
+    """
+    # Handle 'Z' suffix for UTC
+    normalized = dt_str.replace("Z", "+00:00")
+
+    try:
+        dt = datetime.fromisoformat(normalized)
+        return int(calendar.timegm(dt.utctimetuple()))
+    except ValueError:
+        # If parsing fails, return 0 (beginning of epoch)
+        logger.warning(f"Failed to parse datetime string: {normalized}")
+        return 0
+
+
+# Operator factories for the query models. The operands they receive are either models we
+# built ourselves or already type-checked values, so pydantic validation is skipped via
+# model_construct; raw user values go through _user_literal, which validates non-scalars.
+# Field operators are never mutated after construction, so one instance per field name is shared
+@functools.lru_cache(maxsize=256)
+def _get_field(name: str) -> GetFieldOperator:
+    return GetFieldOperator.model_construct(get_field_=name)
+
+
+def _literal(value: Any) -> LiteralOperation:
+    return LiteralOperation.model_construct(literal_=value)
+
+
+# Values LiteralOperation accepts as-is; anything else has to go through its validator
+_SCALAR_LITERAL_TYPES = (str, int, float, bool, type(None))
+
+
+def _user_literal(value: Any) -> LiteralOperation:
+    """Wrap a caller-supplied value, validating only when it is not a plain scalar.
+
+    Raises:
+        ValidationError: If a container value is not shaped like nested literals.
+    """
+    if isinstance(value, _SCALAR_LITERAL_TYPES):
+        return _literal(value)
+    return LiteralOperation(**{"$literal": value})
+
+
+def _eq(left: Any, right: Any) -> EqOperation:
+    return EqOperation.model_construct(eq_=(left, right))
+
+
+def _gt(left: Any, right: Any) -> GtOperation:
+    return GtOperation.model_construct(gt_=(left, right))
+
+
+def _gte(left: Any, right: Any) -> GteOperation:
+    return GteOperation.model_construct(gte_=(left, right))
+
+
+def _not(operand: Any) -> NotOperation:
+    return NotOperation.model_construct(not_=(operand,))
+
+
+def _lt(left: Any, right: Any) -> NotOperation:
+    """The server has no $lt, so ``a < b`` is expressed as ``$not($gte(a, b))``."""
+    return NotOperation.model_construct(not_=(GteOperation.model_construct(gte_=(left, right)),))
+
+
+def _lte(left: Any, right: Any) -> NotOperation:
+    """The server has no $lte, so ``a <= b`` is expressed as ``$not($gt(a, b))``."""
+    return NotOperation.model_construct(not_=(GtOperation.model_construct(gt_=(left, right)),))
+
+
+def _and(operands: List[Any]) -> AndOperation:
+    return AndOperation.model_construct(and_=operands)
+
+
+def _or(operands: List[Any]) -> OrOperation:
+    return OrOperation.model_construct(or_=operands)
+
+
+def _in(operand: Any, candidates: List[Any]) -> InOperation:
+    return InOperation.model_construct(in_=(operand, candidates))
+
+
+def _convert(operand: Any, to: str) -> ConvertOperation:
+    return ConvertOperation.model_construct(convert_=ConvertSpec.model_construct(input=operand, to=to))
+
+
+def _query(expr: Any) -> Query:
+    return Query.model_construct(expr_=expr)
+
+
+def _contains(field_name: str, substring: Any, case_insensitive: bool) -> ContainsOperation:
+    spec = ContainsSpec.model_construct(
+        input=_get_field(field_name), substr=_literal(substring), case_insensitive=case_insensitive
+    )
+    return ContainsOperation.model_construct(contains_=spec)
+
+
+def _strip_wildcards(value: str) -> Optional[str]:
+    """Return ``value`` with its ``*`` wildcards removed, or None if it has none.
+
+    A regex-style ``.*`` contains ``*`` as well, so one membership test covers both
+    spellings and the caller never needs a separate ``in`` check.
+    """
+    # Weave's query language has no anchored (prefix/suffix) match operator, only $contains,
+    # so the position of the wildcards doesn't matter and they are simply dropped
+    if "*" not in value:
+        return None
+    return value.replace("*", "")
+
+
+def _resolve_handler_order(default: Tuple[str, ...], override: str) -> Tuple[str, ...]:
+    """Apply a comma-separated handler order override on top of ``default``.
+
+    Keys named in ``override`` come first, in the given order; unknown keys are ignored
+    and the remaining defaults follow in their original order.
+    """
+    known = set(default)
+    preferred = [key for key in dict.fromkeys(k.strip() for k in override.split(",")) if key in known]
+    return (*preferred, *(key for key in default if key not in preferred))
+
+
+# Translation table that deletes '*' in a single C-level pass
+_DELETE_STARS = str.maketrans("", "", "*")
+
+
+def _classify_run_id(run_id: str) -> Tuple[bool, str]:
+    """Classify a wb_run_id filter string as contains-style or exact.
+
+    Returns:
+        Tuple of (is_contains, cleaned). ``"$contains:foo"`` and ``"foo*"`` style values
+        are contains-style and come back with the marker and wildcards removed.
+    """
+    if "$contains" not in run_id and "*" not in run_id:
+        return False, run_id
+    return True, run_id.replace("$contains:", "").translate(_DELETE_STARS).strip()
+
 
 class QueryBuilder:
     """Builds query expressions for the Weave API."""
@@ -42,9 +191,27 @@ class QueryBuilder:
     # Define cost fields as a class constant
     COST_FIELDS = {"total_cost", "completion_cost", "prompt_cost"}
 
+    # Column path of the per-model cost breakdown the server attaches when include_costs is set
+    COST_SUMMARY_PATH = "summary.weave.costs"
+
+    # Operator keys accepted in {"<op>": value} filter dicts, resolved without enum construction
+    _OP_LOOKUP: Dict[str, FilterOperator] = {op.value: op for op in FilterOperator}
+
     # Define synthetic fields that need special handling
     SYNTHETIC_FIELDS = {"status", "latency_ms"}
 
+    # Canonical (lowercase, interned) forms of the status values callers commonly send, so the
+    # status filter usually avoids re-lowercasing; anything else falls back to str.lower()
+    _STATUS_NORMALIZE: Dict[str, str] = {
+        variant: sys.intern(status)
+        for status in ("success", "error", "running", "descendant_error", "finished", "crashed", "pending")
+        for variant in (status, status.title(), status.upper())
+    }
+
+    # Filter keys that go directly to the CallsFilter object; the list-typed ones are coerced to lists
+    _LIST_KEYS = frozenset({"op_names", "op_names_prefix", "trace_ids", "trace_parent_ids", "parent_ids", "call_ids"})
+    _SIMPLE_KEYS = _LIST_KEYS | {"trace_roots_only"}
+
     @staticmethod
     def datetime_to_timestamp(dt_str: str) -> int:
         """Convert an ISO format datetime string to Unix timestamp.
@@ -58,16 +225,7 @@ class QueryBuilder:
         if not dt_str:
             return 0
 
-        # Handle 'Z' suffix for UTC
-        dt_str = dt_str.replace("Z", "+00:00")
-
-        try:
-            dt = datetime.fromisoformat(dt_str)
-            return int(calendar.timegm(dt.utctimetuple()))
-        except ValueError:
-            # If parsing fails, return 0 (beginning of epoch)
-            logger.warning(f"Failed to parse datetime string: {dt_str}")
-            return 0
+        return _iso_to_timestamp(dt_str)
 
     @classmethod
     def create_comparison_operation(
@@ -84,35 +242,34 @@ class QueryBuilder:
             A comparison operation, or None if the operation could not be created.
         """
         try:
-            field_op_base = GetFieldOperator(**{"$getField": field_name})
-            field_op = field_op_base  # Default to no $convert
-
-            # Apply $convert selectively as it was found to be needed for some attributes
-            if field_name.startswith("attributes."):
-                # For general attributes, convert to double if comparing with a number
-                if isinstance(value, (int, float)):
-                    field_op = ConvertOperation(**{"$convert": {"input": field_op_base, "to": "double"}})
-
-            literal_op = LiteralOperation(**{"$literal": value})
-        except Exception as e:
+            literal_op = _user_literal(value)
+        except ValidationError as e:
             logger.warning(f"Invalid value for {field_name} comparison {operator}: {value}. Error: {e}")
             return None
 
-        if operator == FilterOperator.GREATER_THAN:
-            return GtOperation(**{"$gt": (field_op, literal_op)})
-        elif operator == FilterOperator.GREATER_THAN_EQUAL:
-            return GteOperation(**{"$gte": (field_op, literal_op)})
-        elif operator == FilterOperator.EQUALS:
-            return EqOperation(**{"$eq": (field_op, literal_op)})
-        elif operator == FilterOperator.LESS_THAN:  # Implement $lt as $not($gte)
-            gte_op = GteOperation(**{"$gte": (field_op, literal_op)})
-            return NotOperation(**{"$not": [gte_op]})
-        elif operator == FilterOperator.LESS_THAN_EQUAL:  # Implement $lte as $not($gt)
-            gt_op = GtOperation(**{"$gt": (field_op, literal_op)})
-            return NotOperation(**{"$not": [gt_op]})
-        else:
-            logger.warning(f"Unsupported comparison operator '{operator}' for {field_name}")
-            return None
+        field_op = _get_field(field_name)  # Default to no $convert
+
+        # Apply $convert selectively as it was found to be needed for some attributes
+        if field_name.startswith("attributes."):
+            # For general attributes, convert to double if comparing with a number
+            if isinstance(value, (int, float)):
+                field_op = _convert(field_op, "double")
+
+        # Equality is by far the most common comparison, so it is matched first
+        match operator:
+            case FilterOperator.EQUALS:
+                return _eq(field_op, literal_op)
+            case FilterOperator.GREATER_THAN:
+                return _gt(field_op, literal_op)
+            case FilterOperator.GREATER_THAN_EQUAL:
+                return _gte(field_op, literal_op)
+            case FilterOperator.LESS_THAN:
+                return _lt(field_op, literal_op)
+            case FilterOperator.LESS_THAN_EQUAL:
+                return _lte(field_op, literal_op)
+            case _:
+                logger.warning(f"Unsupported comparison operator '{operator}' for {field_name}")
+                return None
 
     @classmethod
     def create_contains_operation(
@@ -128,317 +285,327 @@ class QueryBuilder:
         Returns:
             A contains operation.
         """
-        return ContainsOperation(
-            **{
-                "$contains": ContainsSpec(
-                    input=GetFieldOperator(**{"$getField": field_name}),
-                    substr=LiteralOperation(**{"$literal": substring}),
-                    case_insensitive=case_insensitive,
-                )
-            }
-        )
+        return _contains(field_name, substring, case_insensitive)
 
     @classmethod
-    def build_query_expression(cls, filters: Dict[str, Any]) -> Optional[Query]:
-        """Build a Query expression from the filter dictionary.
+    def _handle_op_name(cls, op_name: Any, operations: List[Any]) -> None:
+        """Handle the op_name filter (regex or string)."""
+        if isinstance(op_name, str):
+            # If it's a string with wildcard pattern, treat as contains
+            pattern = _strip_wildcards(op_name)
+            if pattern is not None:
+                operations.append(cls.create_contains_operation("op_name", pattern))
+            else:
+                # Exact match
+                operations.append(_eq(_get_field("op_name"), _literal(op_name)))
+        elif hasattr(op_name, "pattern"):  # Regex pattern
+            operations.append(cls.create_contains_operation("op_name", op_name.pattern))
 
-        Args:
-            filters: Dictionary of filter conditions.
+    @classmethod
+    def _handle_op_name_contains(cls, substring: Any, operations: List[Any]) -> None:
+        """Handle the op_name_contains custom filter (for simple substring matching)."""
+        operations.append(cls.create_contains_operation("op_name", substring))
 
-        Returns:
-            The constructed Query object, or None if no valid filters were provided.
-        """
-        operations = []
+    @classmethod
+    def _handle_display_name(cls, display_name: Any, operations: List[Any]) -> None:
+        """Handle the display_name filter (regex or string)."""
+        if isinstance(display_name, str):
+            # If it's a string with wildcard pattern, treat as contains
+            pattern = _strip_wildcards(display_name)
+            if pattern is not None:
+                operations.append(cls.create_contains_operation("display_name", pattern))
+            else:
+                # Exact match
+                operations.append(_eq(_get_field("display_name"), _literal(display_name)))
+        elif hasattr(display_name, "pattern"):  # Regex pattern
+            operations.append(cls.create_contains_operation("display_name", display_name.pattern))
 
-        # Handle op_name filter (regex or string)
-        if "op_name" in filters:
-            op_name = filters["op_name"]
-            if isinstance(op_name, str):
-                # If it's a string with wildcard pattern, treat as contains
-                if "*" in op_name or ".*" in op_name:
-                    # Extract the part between wildcards
-                    pattern = op_name.replace("*", "").replace(".*", "")
-                    operations.append(cls.create_contains_operation("op_name", pattern))
-                else:
-                    # Exact match
-                    operations.append(
-                        EqOperation(
-                            **{
-                                "$eq": (
-                                    GetFieldOperator(**{"$getField": "op_name"}),
-                                    LiteralOperation(**{"$literal": op_name}),
-                                )
-                            }
-                        )
-                    )
-            elif hasattr(op_name, "pattern"):  # Regex pattern
-                operations.append(cls.create_contains_operation("op_name", op_name.pattern))
-
-        # Handle op_name_contains custom filter (for simple substring matching)
-        if "op_name_contains" in filters:
-            substring = filters["op_name_contains"]
-            operations.append(cls.create_contains_operation("op_name", substring))
-
-        # Handle display_name filter (regex or string)
-        if "display_name" in filters:
-            display_name = filters["display_name"]
-            if isinstance(display_name, str):
-                # If it's a string with wildcard pattern, treat as contains
-                if "*" in display_name or ".*" in display_name:
-                    # Extract the part between wildcards
-                    pattern = display_name.replace("*", "").replace(".*", "")
-                    operations.append(cls.create_contains_operation("display_name", pattern))
-                else:
-                    # Exact match
-                    operations.append(
-                        EqOperation(
-                            **{
-                                "$eq": (
-                                    GetFieldOperator(**{"$getField": "display_name"}),
-                                    LiteralOperation(**{"$literal": display_name}),
-                                )
-                            }
-                        )
-                    )
-            elif hasattr(display_name, "pattern"):  # Regex pattern
-                operations.append(cls.create_contains_operation("display_name", display_name.pattern))
-
-        # Handle display_name_contains custom filter (for simple substring matching)
-        if "display_name_contains" in filters:
-            substring = filters["display_name_contains"]
-            operations.append(cls.create_contains_operation("display_name", substring))
-
-        # Handle status filter based on summary.weave.status using dot notation
-        if "status" in filters:
-            target_status = filters["status"]
-            if isinstance(target_status, str):
-                comp_op = cls.create_comparison_operation(
-                    "summary.weave.status", FilterOperator.EQUALS, target_status.lower()
-                )
+    @classmethod
+    def _handle_display_name_contains(cls, substring: Any, operations: List[Any]) -> None:
+        """Handle the display_name_contains custom filter (for simple substring matching)."""
+        operations.append(cls.create_contains_operation("display_name", substring))
+
+    @classmethod
+    def _handle_status(cls, target_status: Any, operations: List[Any]) -> None:
+        """Handle the status filter based on summary.weave.status using dot notation."""
+        if isinstance(target_status, str):
+            status = cls._STATUS_NORMALIZE.get(target_status) or target_status.lower()
+            comp_op = cls.create_comparison_operation("summary.weave.status", FilterOperator.EQUALS, status)
+            if comp_op:
+                operations.append(comp_op)
+        else:
+            logger.warning(f"Invalid status filter value: {target_status}. Expected a string.")
+
+    @classmethod
+    def _handle_time_range(cls, time_range: Any, operations: List[Any]) -> None:
+        """Handle the time range filter (convert ISO datetime strings to Unix seconds)."""
+        # >= start
+        if start := time_range.get("start"):
+            start_ts = cls.datetime_to_timestamp(start)
+            if start_ts > 0:
+                comp_op = cls.create_comparison_operation("started_at", FilterOperator.GREATER_THAN_EQUAL, start_ts)
+                if comp_op:
+                    operations.append(comp_op)
+
+        # < end (i.e. started_at strictly before end_ts)
+        if end := time_range.get("end"):
+            end_ts = cls.datetime_to_timestamp(end)
+            if end_ts > 0:
+                comp_op = cls.create_comparison_operation("started_at", FilterOperator.LESS_THAN, end_ts)
                 if comp_op:
                     operations.append(comp_op)
+
+    @classmethod
+    def _handle_wb_run_id(cls, run_id: Any, operations: List[Any]) -> None:
+        """Handle the top-level wb_run_id filter."""
+        # This filter expects a string for wb_run_id and uses $contains or $eq.
+        if isinstance(run_id, str):
+            is_contains, pattern = _classify_run_id(run_id)
+            if is_contains:
+                operations.append(cls.create_contains_operation("wb_run_id", pattern))
+            else:
+                operations.append(_eq(_get_field("wb_run_id"), _literal(run_id)))
+        elif (
+            isinstance(run_id, dict) and (pattern := run_id.get("$contains", _MISSING)) is not _MISSING
+        ):  # wb_run_id: {"$contains": "foo"}
+            if isinstance(pattern, str):
+                operations.append(cls.create_contains_operation("wb_run_id", pattern))
             else:
-                logger.warning(f"Invalid status filter value: {target_status}. Expected a string.")
+                logger.warning(f"Invalid $contains value for wb_run_id: {pattern}. Expected string.")
+        else:
+            logger.warning(f"Invalid wb_run_id filter value: {run_id}. Expected a string or dict with $contains.")
 
-        # Handle time range filter (convert ISO datetime strings to Unix seconds)
-        if "time_range" in filters:
-            time_range = filters["time_range"]
+    @classmethod
+    def _handle_latency(cls, latency_filter: Any, operations: List[Any]) -> None:
+        """Handle the latency filter based on summary.weave.latency_ms."""
+        # Extract the operator and value
+        if isinstance(latency_filter, dict) and len(latency_filter) == 1:
+            op_key, value = next(iter(latency_filter.items()))
+            if (op := cls._OP_LOOKUP.get(op_key)) is not None:
+                comp_op = cls.create_comparison_operation("summary.weave.latency_ms", op, value)
+                if comp_op:
+                    operations.append(comp_op)
+            else:
+                logger.warning(f"Invalid operator for latency filter: {op_key}")
+        else:
+            logger.warning(
+                f"Invalid format for latency filter: {latency_filter}. Expected a dict with one operator key."
+            )
 
-            # >= start
-            if "start" in time_range and time_range["start"]:
-                start_ts = cls.datetime_to_timestamp(time_range["start"])
-                if start_ts > 0:
-                    comp_op = cls.create_comparison_operation("started_at", FilterOperator.GREATER_THAN_EQUAL, start_ts)
-                    if comp_op:
-                        operations.append(comp_op)
+    @classmethod
+    def _handle_attributes(cls, attributes_filters: Any, operations: List[Any]) -> None:
+        """Handle the attributes filter using dot notation AND supporting comparison operators."""
+        if isinstance(attributes_filters, dict):
+            for attr_path, attr_value_or_op in attributes_filters.items():
+                full_attr_path = f"attributes.{attr_path}"
 
-            # < end (i.e. started_at strictly before end_ts)
-            if "end" in time_range and time_range["end"]:
-                end_ts = cls.datetime_to_timestamp(time_range["end"])
-                if end_ts > 0:
-                    comp_op = cls.create_comparison_operation("started_at", FilterOperator.LESS_THAN, end_ts)
+                # Check if the value is a comparison operator dict or a literal
+                if (
+                    isinstance(attr_value_or_op, dict)
+                    and len(attr_value_or_op) == 1
+                    and (op := cls._OP_LOOKUP.get(next(iter(attr_value_or_op)))) is not None
+                ):
+                    # It's a comparison operation
+                    comp_op = cls.create_comparison_operation(full_attr_path, op, attr_value_or_op[op.value])
                     if comp_op:
                         operations.append(comp_op)
-
-        # Handle wb_run_id filter (top-level)
-        if "wb_run_id" in filters:
-            run_id = filters["wb_run_id"]
-            # This filter expects a string for wb_run_id and uses $contains or $eq.
-            if isinstance(run_id, str):
-                if "$contains" in run_id or "*" in run_id:  # Simple check for contains style
-                    pattern = run_id.replace("$contains:", "").replace("*", "")  # Basic cleanup
-                    operations.append(cls.create_contains_operation("wb_run_id", pattern.strip()))
-                else:
-                    operations.append(
-                        EqOperation(
-                            **{
-                                "$eq": (
-                                    GetFieldOperator(**{"$getField": "wb_run_id"}),
-                                    LiteralOperation(**{"$literal": run_id}),
-                                )
-                            }
+                elif (
+                    isinstance(attr_value_or_op, dict)
+                    and (substring := attr_value_or_op.get("$contains", _MISSING)) is not _MISSING
+                ):
+                    # It's a contains operation
+                    if isinstance(substring, str):
+                        operations.append(cls.create_contains_operation(full_attr_path, substring))
+                    else:
+                        logger.warning(
+                            f"Invalid value for $contains on {full_attr_path}: {substring}. Expected string."
                         )
-                    )
-            elif isinstance(run_id, dict) and "$contains" in run_id:  # wb_run_id: {"$contains": "foo"}
-                pattern = run_id["$contains"]
-                if isinstance(pattern, str):
-                    operations.append(cls.create_contains_operation("wb_run_id", pattern))
                 else:
-                    logger.warning(f"Invalid $contains value for wb_run_id: {pattern}. Expected string.")
-            else:
-                logger.warning(f"Invalid wb_run_id filter value: {run_id}. Expected a string or dict with $contains.")
-
-        # Handle latency filter based on summary.weave.latency_ms
-        if "latency" in filters:
-            latency_filter = filters["latency"]
-            # Extract the operator and value
-            if isinstance(latency_filter, dict) and len(latency_filter) == 1:
-                op_key, value = next(iter(latency_filter.items()))
-                try:
-                    op = FilterOperator(op_key)
-                    comp_op = cls.create_comparison_operation("summary.weave.latency_ms", op, value)
+                    # Assume literal equality
+                    comp_op = cls.create_comparison_operation(full_attr_path, FilterOperator.EQUALS, attr_value_or_op)
                     if comp_op:
                         operations.append(comp_op)
-                except (ValueError, KeyError):
-                    logger.warning(f"Invalid operator for latency filter: {op_key}")
-            else:
-                logger.warning(
-                    f"Invalid format for latency filter: {latency_filter}. Expected a dict with one operator key."
-                )
-
-        # Handle attributes filter using dot notation AND supporting comparison operators
-        if "attributes" in filters:
-            attributes_filters = filters["attributes"]
-            if isinstance(attributes_filters, dict):
-                for attr_path, attr_value_or_op in attributes_filters.items():
-                    full_attr_path = f"attributes.{attr_path}"
-
-                    # Check if the value is a comparison operator dict or a literal
-                    if (
-                        isinstance(attr_value_or_op, dict)
-                        and len(attr_value_or_op) == 1
-                        and next(iter(attr_value_or_op.keys())) in [op.value for op in FilterOperator]
-                    ):
-                        # It's a comparison operation
-                        op_key, value = next(iter(attr_value_or_op.items()))
-                        try:
-                            op = FilterOperator(op_key)
-                            comp_op = cls.create_comparison_operation(full_attr_path, op, value)
-                            if comp_op:
-                                operations.append(comp_op)
-                        except (ValueError, KeyError):
-                            logger.warning(f"Invalid operator for attribute filter: {op_key}")
-                    elif isinstance(attr_value_or_op, dict) and "$contains" in attr_value_or_op:
-                        # It's a contains operation
-                        if isinstance(attr_value_or_op["$contains"], str):
-                            operations.append(
-                                cls.create_contains_operation(full_attr_path, attr_value_or_op["$contains"])
-                            )
-                        else:
-                            logger.warning(
-                                f"Invalid value for $contains on {full_attr_path}: {attr_value_or_op['$contains']}. Expected string."
-                            )
+        else:
+            logger.warning(f"Invalid format for 'attributes' filter: {attributes_filters}. Expected a dictionary.")
+
+    @classmethod
+    def _handle_inputs(cls, inputs_filters: Any, operations: List[Any]) -> None:
+        """Handle the inputs filter (substring search on trace inputs via $contains)."""
+        if isinstance(inputs_filters, dict):
+            for input_path, input_condition in inputs_filters.items():
+                full_path = f"inputs.{input_path}"
+                if (
+                    isinstance(input_condition, dict)
+                    and (substring := input_condition.get("$contains", _MISSING)) is not _MISSING
+                ):
+                    if isinstance(substring, str):
+                        operations.append(cls.create_contains_operation(full_path, substring))
                     else:
-                        # Assume literal equality
-                        comp_op = cls.create_comparison_operation(
-                            full_attr_path, FilterOperator.EQUALS, attr_value_or_op
-                        )
+                        logger.warning(f"Invalid $contains value for {full_path}: expected string.")
+                elif isinstance(input_condition, dict):
+                    for op_key, value in input_condition.items():
+                        op = cls._OP_LOOKUP.get(op_key)
+                        if op is None:
+                            logger.warning(f"Invalid operator for inputs filter: {op_key}")
+                            continue
+                        comp_op = cls.create_comparison_operation(full_path, op, value)
                         if comp_op:
                             operations.append(comp_op)
+                else:
+                    comp_op = cls.create_comparison_operation(full_path, FilterOperator.EQUALS, input_condition)
+                    if comp_op:
+                        operations.append(comp_op)
+
+    @classmethod
+    def _handle_output(cls, output_filter: Any, operations: List[Any]) -> None:
+        """Handle the output filter (substring search on trace output via $contains)."""
+        if isinstance(output_filter, dict) and (substring := output_filter.get("$contains", _MISSING)) is not _MISSING:
+            if isinstance(substring, str):
+                operations.append(cls.create_contains_operation("output", substring))
             else:
-                logger.warning(f"Invalid format for 'attributes' filter: {attributes_filters}. Expected a dictionary.")
-
-        # Handle inputs filter (substring search on trace inputs via $contains)
-        if "inputs" in filters:
-            inputs_filters = filters["inputs"]
-            if isinstance(inputs_filters, dict):
-                for input_path, input_condition in inputs_filters.items():
-                    full_path = f"inputs.{input_path}"
-                    if isinstance(input_condition, dict) and "$contains" in input_condition:
-                        if isinstance(input_condition["$contains"], str):
-                            operations.append(cls.create_contains_operation(full_path, input_condition["$contains"]))
-                        else:
-                            logger.warning(f"Invalid $contains value for {full_path}: expected string.")
-                    elif isinstance(input_condition, dict):
-                        for op_key, value in input_condition.items():
-                            try:
-                                op = FilterOperator(op_key)
-                                comp_op = cls.create_comparison_operation(full_path, op, value)
-                                if comp_op:
-                                    operations.append(comp_op)
-                            except (ValueError, KeyError):
-                                logger.warning(f"Invalid operator for inputs filter: {op_key}")
+                logger.warning("Invalid $contains value for output: expected string.")
+        elif isinstance(output_filter, dict):
+            for output_path, output_condition in output_filter.items():
+                full_path = f"output.{output_path}"
+                if (
+                    isinstance(output_condition, dict)
+                    and (substring := output_condition.get("$contains", _MISSING)) is not _MISSING
+                ):
+                    if isinstance(substring, str):
+                        operations.append(cls.create_contains_operation(full_path, substring))
                     else:
-                        comp_op = cls.create_comparison_operation(full_path, FilterOperator.EQUALS, input_condition)
+                        logger.warning(f"Invalid $contains value for {full_path}: expected string.")
+                elif isinstance(output_condition, dict):
+                    for op_key, value in output_condition.items():
+                        op = cls._OP_LOOKUP.get(op_key)
+                        if op is None:
+                            logger.warning(f"Invalid operator for output filter: {op_key}")
+                            continue
+                        comp_op = cls.create_comparison_operation(full_path, op, value)
                         if comp_op:
                             operations.append(comp_op)
-
-        # Handle output filter (substring search on trace output via $contains)
-        if "output" in filters:
-            output_filter = filters["output"]
-            if isinstance(output_filter, dict) and "$contains" in output_filter:
-                if isinstance(output_filter["$contains"], str):
-                    operations.append(cls.create_contains_operation("output", output_filter["$contains"]))
                 else:
-                    logger.warning("Invalid $contains value for output: expected string.")
-            elif isinstance(output_filter, dict):
-                for output_path, output_condition in output_filter.items():
-                    full_path = f"output.{output_path}"
-                    if isinstance(output_condition, dict) and "$contains" in output_condition:
-                        if isinstance(output_condition["$contains"], str):
-                            operations.append(cls.create_contains_operation(full_path, output_condition["$contains"]))
-                        else:
-                            logger.warning(f"Invalid $contains value for {full_path}: expected string.")
-                    elif isinstance(output_condition, dict):
-                        for op_key, value in output_condition.items():
-                            try:
-                                op = FilterOperator(op_key)
-                                comp_op = cls.create_comparison_operation(full_path, op, value)
-                                if comp_op:
-                                    operations.append(comp_op)
-                            except (ValueError, KeyError):
-                                logger.warning(f"Invalid operator for output filter: {op_key}")
-                    else:
-                        comp_op = cls.create_comparison_operation(full_path, FilterOperator.EQUALS, output_condition)
-                        if comp_op:
-                            operations.append(comp_op)
+                    comp_op = cls.create_comparison_operation(full_path, FilterOperator.EQUALS, output_condition)
+                    if comp_op:
+                        operations.append(comp_op)
 
-        # Handle $in filter for multi-value matching (e.g., status $in ["error", "running"])
-        if "$in" in filters:
-            in_filters = filters["$in"]
-            if isinstance(in_filters, dict):
-                for field_name, values in in_filters.items():
-                    if isinstance(values, list) and values:
-                        field_op = GetFieldOperator(**{"$getField": field_name})
-                        literal_ops = [LiteralOperation(**{"$literal": v}) for v in values]
-                        operations.append(InOperation(**{"$in": (field_op, literal_ops)}))
-
-        # Handle $or for combining alternative conditions
-        if "$or" in filters:
-            or_clauses = filters["$or"]
-            if isinstance(or_clauses, list) and or_clauses:
-                sub_queries = []
-                for clause in or_clauses:
-                    if isinstance(clause, dict):
-                        sub_query = cls.build_query_expression(clause)
-                        if sub_query and hasattr(sub_query, "expr_"):
-                            sub_queries.append(sub_query.expr_)
-                if len(sub_queries) == 1:
-                    operations.append(sub_queries[0])
-                elif len(sub_queries) > 1:
-                    operations.append(OrOperation(**{"$or": sub_queries}))
-
-        # Handle has_exception filter (checking top-level exception field)
-        if "has_exception" in filters:
-            has_exception = filters["has_exception"]
-            # Skip filtering if has_exception is None (show everything)
-            if has_exception is not None:
-                # Create base operation that checks if exception is None (no exception case)
-                base_op = EqOperation(
-                    **{
-                        "$eq": (
-                            GetFieldOperator(**{"$getField": "exception"}),
-                            LiteralOperation(**{"$literal": None}),
-                        )
-                    }
-                )
+    @classmethod
+    def _handle_in(cls, in_filters: Any, operations: List[Any]) -> None:
+        """Handle the $in filter for multi-value matching (e.g., status $in ["error", "running"])."""
+        if isinstance(in_filters, dict):
+            for field_name, values in in_filters.items():
+                if isinstance(values, list) and values:
+                    literal_ops = [_user_literal(v) for v in values]
+                    operations.append(_in(_get_field(field_name), literal_ops))
 
-                if has_exception:
-                    # For has_exception=True: Negate the operation to get NOT NULL
-                    operations.append(NotOperation(**{"$not": [base_op]}))
-                else:
-                    # For has_exception=False: Use the operation as is
-                    operations.append(base_op)
+    @classmethod
+    def _handle_or(cls, or_clauses: Any, operations: List[Any]) -> None:
+        """Handle $or for combining alternative conditions."""
+        if isinstance(or_clauses, list) and or_clauses:
+            sub_queries = []
+            for clause in or_clauses:
+                if isinstance(clause, dict):
+                    sub_query = cls.build_query_expression(clause)
+                    if sub_query and hasattr(sub_query, "expr_"):
+                        sub_queries.append(sub_query.expr_)
+            if len(sub_queries) == 1:
+                operations.append(sub_queries[0])
+            elif len(sub_queries) > 1:
+                operations.append(_or(sub_queries))
+
+    @classmethod
+    def _handle_has_exception(cls, has_exception: Any, operations: List[Any]) -> None:
+        """Handle the has_exception filter (checking top-level exception field)."""
+        # Skip filtering if has_exception is None (show everything)
+        if has_exception is None:
+            return
+
+        # Create base operation that checks if exception is None (no exception case)
+        base_op = _eq(_get_field("exception"), _literal(None))
+
+        if has_exception:
+            # For has_exception=True: Negate the operation to get NOT NULL
+            operations.append(_not(base_op))
+        else:
+            # For has_exception=False: Use the operation as is
+            operations.append(base_op)
+
+    # Filter keys understood by build_query_expression, mapped to their handler methods.
+    _FILTER_HANDLERS: Dict[str, str] = {
+        "op_name": "_handle_op_name",
+        "op_name_contains": "_handle_op_name_contains",
+        "display_name": "_handle_display_name",
+        "display_name_contains": "_handle_display_name_contains",
+        "status": "_handle_status",
+        "time_range": "_handle_time_range",
+        "wb_run_id": "_handle_wb_run_id",
+        "latency": "_handle_latency",
+        "attributes": "_handle_attributes",
+        "inputs": "_handle_inputs",
+        "output": "_handle_output",
+        "$in": "_handle_in",
+        "$or": "_handle_or",
+        "has_exception": "_handle_has_exception",
+    }
+
+    # Order in which handlers run, most frequently used filters first. This also fixes the
+    # operand order of the emitted $and. Can be re-tuned with WANDB_QB_HANDLER_ORDER.
+    _HANDLER_ORDER: Tuple[str, ...] = _resolve_handler_order(
+        (
+            "time_range",
+            "status",
+            "op_name",
+            "attributes",
+            "latency",
+            "wb_run_id",
+            "display_name",
+            "has_exception",
+            "op_name_contains",
+            "display_name_contains",
+            "inputs",
+            "output",
+            "$in",
+            "$or",
+        ),
+        WANDB_QB_HANDLER_ORDER,
+    )
+
+    @classmethod
+    @functools.lru_cache(maxsize=128)
+    def _handler_plan(cls, filter_keys: frozenset) -> Tuple[Tuple[str, Callable[[Any, List[Any]], None]], ...]:
+        """Resolve the ordered handlers for one filter shape (its set of keys).
+
+        Callers tend to repeat the same handful of filter shapes, so the plan is cached
+        per key set and build_query_expression only visits handlers that will emit ops.
+        """
+        return tuple((key, getattr(cls, cls._FILTER_HANDLERS[key])) for key in cls._HANDLER_ORDER if key in filter_keys)
+
+    @classmethod
+    def build_query_expression(cls, filters: Dict[str, Any]) -> Optional[Query]:
+        """Build a Query expression from the filter dictionary.
+
+        Args:
+            filters: Dictionary of filter conditions.
+
+        Returns:
+            The constructed Query object, or None if no valid filters were provided.
+        """
+        if not filters:
+            return None
+
+        operations = []
+
+        for key, handler in cls._handler_plan(frozenset(filters)):
+            handler(filters[key], operations)
 
         # Combine all operations with AND
         if operations:
             if len(operations) == 1:
                 # Wrap the single operation in the Query model structure
-                return Query(**{"$expr": operations[0]})
+                return _query(operations[0])
             else:
                 # Wrap the AndOperation in the Query model structure
-                and_op = AndOperation(**{"$and": operations})
-                return Query(**{"$expr": and_op})
+                return _query(_and(operations))
 
         return None  # No complex filters, so no Query object needed
 
@@ -455,9 +622,9 @@ class QueryBuilder:
         if not filters:
             return {}, {}
 
-        # Convert QueryFilter to dict if needed
+        # Convert QueryFilter (a dataclass) to dict if needed, dropping unset fields
         if isinstance(filters, QueryFilter):
-            filters_dict = {k: v for k, v in filters.__dict__.items() if v is not None}
+            filters_dict = {k: v for k, v in vars(filters).items() if v is not None}
         else:
             filters_dict = filters
 
@@ -465,88 +632,57 @@ class QueryBuilder:
         direct_filters = {}
         complex_filters = {}
 
-        # Simple filter keys that go directly to the CallsFilter object
-        simple_filter_keys = [
-            "trace_roots_only",
-            "op_names",
-            "op_names_prefix",
-            "trace_ids",
-            "trace_parent_ids",
-            "parent_ids",
-            "call_ids",
-        ]
-
-        for key in simple_filter_keys:
-            if key in filters_dict:
+        # One pass: CallsFilter keys go straight to direct_filters, everything else is complex
+        for key, value in filters_dict.items():
+            if key in cls._LIST_KEYS:
                 # Ensure op_names, trace_ids, etc. are lists as expected by CallsFilter
-                if key in [
-                    "op_names",
-                    "op_names_prefix",
-                    "trace_ids",
-                    "trace_parent_ids",
-                    "parent_ids",
-                    "call_ids",
-                ] and not isinstance(filters_dict[key], list):
-                    direct_filters[key] = [str(filters_dict[key])]
-                else:
-                    direct_filters[key] = filters_dict[key]
-
-                # Ensure call_ids are strings
-                if key == "call_ids" and isinstance(direct_filters[key], list):
-                    direct_filters[key] = [str(call_id) for call_id in direct_filters[key]]
-
-        # Handle individual op_name and trace_id if op_names/trace_ids not already set
-        if "op_name" in filters_dict and "op_names" not in direct_filters:
-            # Only add if it's a simple name, not a pattern (patterns go to complex)
-            if (
-                isinstance(filters_dict["op_name"], str)
-                and "*" not in filters_dict["op_name"]
-                and ".*" not in filters_dict["op_name"]
-            ):
-                direct_filters["op_names"] = [filters_dict["op_name"]]
+                if not isinstance(value, list):
+                    value = [str(value)]
+                elif key == "call_ids":
+                    # Ensure call_ids are strings
+                    value = [str(call_id) for call_id in value]
+                direct_filters[key] = value
+            elif key in cls._SIMPLE_KEYS:
+                direct_filters[key] = value
             else:
-                # It's a pattern or complex, send to complex_filters
-                complex_filters["op_name"] = filters_dict["op_name"]
-        elif "op_name" in filters_dict and "op_names" in direct_filters:
-            # If op_names is already set, and op_name is a pattern, it needs to go to complex
-            if isinstance(filters_dict["op_name"], str) and (
-                "*" in filters_dict["op_name"] or ".*" in filters_dict["op_name"]
-            ):
-                complex_filters["op_name"] = filters_dict["op_name"]
-
-        if "trace_id" in filters_dict and "trace_ids" not in direct_filters:
-            direct_filters["trace_ids"] = [str(filters_dict["trace_id"])]
-
-        # All other keys from the original `filters` dict go to complex_filters
-        all_handled_direct_keys = set(direct_filters.keys())
-        # Add op_name/trace_id to handled if they were processed into op_names/trace_ids
-        if (
-            "op_names" in direct_filters
-            and "op_name" in filters_dict
-            and filters_dict["op_name"] in direct_filters["op_names"]
-        ):
-            all_handled_direct_keys.add("op_name")
-        if (
-            "trace_ids" in direct_filters
-            and "trace_id" in filters_dict
-            and filters_dict["trace_id"] in direct_filters["trace_ids"]
-        ):
-            all_handled_direct_keys.add("trace_id")
-
-        for key, value in filters_dict.items():
-            if key not in all_handled_direct_keys:
-                # Exception: if op_name was simple and handled, but is also in filters, it shouldn't be added again
-                if (
-                    key == "op_name"
-                    and "op_names" in direct_filters
-                    and value in direct_filters["op_names"]
-                    and not (isinstance(value, str) and ("*" in value or ".*" in value))
-                ):
-                    continue
                 complex_filters[key] = value
 
+        # Promote individual op_name / trace_id to op_names / trace_ids if those aren't already set
+        # (patterns and names not covered by op_names stay complex)
+        op_name = complex_filters.get("op_name", _MISSING)
+        if op_name is not _MISSING and not (isinstance(op_name, str) and "*" in op_name):
+            op_names = direct_filters.get("op_names")
+            if op_names is None:
+                # A freshly promoted name is trivially covered, so no membership scan is needed
+                if isinstance(op_name, str):
+                    direct_filters["op_names"] = [op_name]
+                    del complex_filters["op_name"]
+            elif op_name in op_names:
+                del complex_filters["op_name"]
+
+        trace_id = complex_filters.get("trace_id", _MISSING)
+        if trace_id is not _MISSING:
+            trace_ids = direct_filters.get("trace_ids")
+            if trace_ids is None:
+                trace_ids = direct_filters["trace_ids"] = [str(trace_id)]
+            if trace_id in trace_ids:
+                del complex_filters["trace_id"]
+
         return direct_filters, complex_filters
 
+    # Keyword arguments of prepare_query_params_kw that prepare_query_params reads from its params
+    _QUERY_PARAM_KEYS = (
+        "filters",
+        "sort_by",
+        "sort_direction",
+        "limit",
+        "offset",
+        "include_costs",
+        "include_feedback",
+        "columns",
+        "expand_columns",
+    )
+
     @classmethod
     def prepare_query_params(cls, params: Union[QueryParams, Dict[str, Any]]) -> Dict[str, Any]:
         """Prepare query parameters for the Weave API.
@@ -555,97 +691,97 @@ class QueryBuilder:
             params: Query parameters, either as a QueryParams object or a dictionary.
 
         Returns:
-            Dictionary of query parameters ready for the Weave API.
+            Dictionary of query parameters ready for the Weave API. Synthetic fields that must be
+            generated client-side are listed under the ``_synthetic_fields`` key.
         """
-        # Convert QueryParams to dict if needed
-        if isinstance(params, QueryParams):
-            # Convert to dict (simplified for illustration)
-            raw_params = {
-                "entity_name": params.entity_name,
-                "project_name": params.project_name,
-                "filters": params.filters,
-                "sort_by": params.sort_by,
-                "sort_direction": params.sort_direction,
-                "limit": params.limit,
-                "offset": params.offset,
-                "include_costs": params.include_costs,
-                "include_feedback": params.include_feedback,
-                "columns": params.columns,
-                "expand_columns": params.expand_columns,
-            }
-        else:
-            raw_params = params.copy()
+        # raw_params is only read below, so use the dataclass __dict__ / caller's dict without copying
+        raw_params = vars(params) if isinstance(params, QueryParams) else params
 
-        # Extract filters
-        filters = raw_params.get("filters", {})
+        request_body, synthetic_fields = cls.prepare_query_params_kw(
+            entity_name=raw_params["entity_name"],
+            project_name=raw_params["project_name"],
+            **{key: raw_params[key] for key in cls._QUERY_PARAM_KEYS if key in raw_params},
+        )
+        if synthetic_fields:
+            request_body["_synthetic_fields"] = synthetic_fields
+        return request_body
+
+    @classmethod
+    def prepare_query_params_kw(
+        cls,
+        *,
+        entity_name: str,
+        project_name: str,
+        filters: Optional[Union[Dict[str, Any], QueryFilter]] = None,
+        sort_by: Optional[str] = None,
+        sort_direction: str = "desc",
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include_costs: bool = True,
+        include_feedback: bool = True,
+        columns: Optional[List[str]] = None,
+        expand_columns: Optional[List[str]] = None,
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Build the Weave API request body directly from keyword arguments.
+
+        Same request body as prepare_query_params, without going through an intermediate
+        params dict and without the ``_synthetic_fields`` entry in the body.
 
+        Returns:
+            Tuple of (request_body, synthetic_fields) where synthetic_fields are the requested
+            columns that must be generated client-side.
+        """
         # Separate filters
         direct_filters, complex_filters = cls.separate_filters(filters)
 
         # Prepare request body
         request_body = {
-            "project_id": f"{raw_params['entity_name']}/{raw_params['project_name']}",
-            "include_costs": raw_params.get("include_costs", True),
-            "include_feedback": raw_params.get("include_feedback", True),
+            "project_id": f"{entity_name}/{project_name}",
+            "include_costs": include_costs,
+            "include_feedback": include_feedback,
         }
 
         # Add filter if present
         if direct_filters:
             request_body["filter"] = direct_filters
 
-        # Add query expression if present
-        query_expression = cls.build_query_expression(complex_filters)
-        if query_expression:
-            request_body["query"] = query_expression.model_dump(by_alias=True)
+        # Add query expression if present; simple-filter-only queries skip the builder entirely
+        if complex_filters:
+            query_expression = cls.build_query_expression(complex_filters)
+            if query_expression:
+                request_body["query"] = query_expression.model_dump(by_alias=True)
 
         # Add sort criteria if present, but never send cost fields to server
-        sort_by = raw_params.get("sort_by")
         if sort_by and sort_by not in cls.COST_FIELDS:
-            request_body["sort_by"] = [
-                {
-                    "field": sort_by,
-                    "direction": raw_params.get("sort_direction", "desc"),
-                }
-            ]
+            request_body["sort_by"] = [{"field": sort_by, "direction": sort_direction}]
 
         # Add pagination parameters if present
-        if "limit" in raw_params and raw_params["limit"] is not None:
-            request_body["limit"] = raw_params["limit"]
-        if "offset" in raw_params and raw_params["offset"] is not None:
-            request_body["offset"] = raw_params["offset"]
+        if limit is not None:
+            request_body["limit"] = limit
+        if offset is not None:
+            request_body["offset"] = offset
 
         # Process columns, filtering out synthetic fields
-        if "columns" in raw_params and raw_params["columns"]:
-            original_columns = raw_params["columns"]
+        synthetic_fields_to_add: List[str] = []
+        if columns:
+            # Ordered, de-duplicated view of the requested columns with O(1) membership
+            original_columns = dict.fromkeys(columns)
 
             # Store synthetic fields we need to generate later
-            synthetic_fields_to_add = []
+            synthetic_fields_to_add = [col for col in original_columns if col in cls.SYNTHETIC_FIELDS]
 
             # Filter out synthetic fields from the API request
-            filtered_columns = []
-            for col in original_columns:
-                if col in cls.SYNTHETIC_FIELDS:
-                    synthetic_fields_to_add.append(col)
-                else:
-                    filtered_columns.append(col)
-
-            # If we need to synthesize status, ensure we request summary field
-            if "status" in synthetic_fields_to_add and "summary" not in filtered_columns:
-                filtered_columns.append("summary")
+            filtered_columns = [col for col in original_columns if col not in cls.SYNTHETIC_FIELDS]
 
-            # If we need to synthesize latency_ms, ensure we request summary field
-            if "latency_ms" in synthetic_fields_to_add and "summary" not in filtered_columns:
+            # Both status and latency_ms are synthesized from the summary field
+            if synthetic_fields_to_add and "summary" not in original_columns:
                 filtered_columns.append("summary")
 
             # Only send filtered columns to the API
             if filtered_columns:
                 request_body["columns"] = filtered_columns
 
-            # Store the synthetic fields that need to be processed
-            if synthetic_fields_to_add:
-                request_body["_synthetic_fields"] = synthetic_fields_to_add
+        if expand_columns:
+            request_body["expand_columns"] = expand_columns
 
-        if "expand_columns" in raw_params and raw_params["expand_columns"]:
-            request_body["expand_columns"] = raw_params["expand_columns"]
-
-        return request_body
+        return request_body, synthetic_fields_to_add
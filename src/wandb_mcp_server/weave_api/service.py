@@ -7,8 +7,15 @@ It orchestrates the client, query builder, and processor components.
 
 from __future__ import annotations
 
+import heapq
+import json
+import logging
 import sys
-from typing import Any, Dict, List, Optional, Set
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Collection, Dict, Iterable, List, Optional, Set
 
 from wandb_mcp_server.utils import get_rich_logger
 from wandb_mcp_server.config import WF_TRACE_SERVER_URL, MAX_ACCUMULATED_BYTES
@@ -22,48 +29,152 @@ from wandb_mcp_server.weave_api.query_builder import QueryBuilder
 try:
     from weave.trace_server.trace_server_interface import CallSchema
 
-    VALID_COLUMNS = set(CallSchema.__annotations__.keys())
+    VALID_COLUMNS = frozenset(CallSchema.__annotations__.keys())
     HAVE_CALL_SCHEMA = True
 except ImportError:
     # Fallback if CallSchema isn't available
-    VALID_COLUMNS = {
-        "id",
-        "project_id",
-        "op_name",
-        "display_name",
-        "trace_id",
-        "parent_id",
-        "started_at",
-        "attributes",
-        "inputs",
-        "ended_at",
-        "exception",
-        "output",
-        "summary",
-        "wb_user_id",
-        "wb_run_id",
-        "deleted_at",
-        "storage_size_bytes",
-        "total_storage_size_bytes",
-    }
+    VALID_COLUMNS = frozenset(
+        {
+            "id",
+            "project_id",
+            "op_name",
+            "display_name",
+            "trace_id",
+            "parent_id",
+            "started_at",
+            "attributes",
+            "inputs",
+            "ended_at",
+            "exception",
+            "output",
+            "summary",
+            "wb_user_id",
+            "wb_run_id",
+            "deleted_at",
+            "storage_size_bytes",
+            "total_storage_size_bytes",
+        }
+    )
     HAVE_CALL_SCHEMA = False
 
 logger = get_rich_logger(__name__)
 
+# Columns that are synthesized client-side rather than requested from the API verbatim
+_SYNTHETIC = frozenset({"costs", "status", "latency_ms"})
+
+# Server-side source of the synthetic 'latency_ms' column
+_LATENCY_SUMMARY_FIELD = "summary.weave.latency_ms"
+
+# Cost fields are never sent to the server for sorting; they are sorted client-side
+_COST_FIELDS = frozenset({"total_cost", "completion_cost", "prompt_cost"})
+
+# Sort fields that don't map to themselves: (server sort field, sorted client-side by cost)
+_SORT_FIELD_OVERRIDES: Dict[str, tuple[str, bool]] = {
+    "latency_ms": (_LATENCY_SUMMARY_FIELD, False),
+    **{cost_field: ("started_at", True) for cost_field in _COST_FIELDS},
+}
+
+# Trace counts by server and count request: (monotonic time fetched, count), oldest first.
+# Module-level because a TraceService is usually built per request.
+_TRACE_COUNT_CACHE: Dict[str, tuple[float, int]] = {}
+_TRACE_COUNT_CACHE_LOCK = threading.Lock()
+
+# How many trace ids to include in the per-batch "missing synthetic data" warning
+_MISSING_IDS_PREVIEW = 5
+
+
+def _merge_synthetic_fields(flagged: List[str], requested: List[str]) -> List[str]:
+    """Ordered union of the synthetic fields flagged by the query builder and those requested."""
+    # dict keys keep first-seen order and drop duplicates from either list in one pass
+    return list(dict.fromkeys([*flagged, *requested]))
+
+
+def _select_by_cost(
+    traces: List[Dict[str, Any]], sort_by: str, sort_direction: str, limit: Optional[int]
+) -> List[Dict[str, Any]]:
+    """Order traces by a cost field and keep at most `limit` of them (all if None)."""
+
+    # Both the heap selection and sorted() call the key exactly once per trace, in the same pass
+    # that orders them, so no separate list of costs is built
+    def cost(trace: Dict[str, Any]) -> float:
+        return TraceProcessor.get_cost(trace, sort_by)
+
+    if limit is not None and limit < len(traces):
+        # Only the top `limit` are kept, so a bounded heap beats a full sort; like a stable
+        # sort, ties keep their fetch order
+        select = heapq.nlargest if sort_direction == "desc" else heapq.nsmallest
+        return select(limit, traces, key=cost)
+    return sorted(traces, key=cost, reverse=(sort_direction == "desc"))
+
+
+def _stream_top_ids_by_cost(
+    traces: Iterable[Dict[str, Any]], sort_by: str, sort_direction: str, limit: Optional[int]
+) -> tuple[List[Any], int]:
+    """Ids of the top `limit` traces by a cost field (all if None), read from a trace stream.
+
+    Only (cost, position, id) entries are kept, never the traces themselves, so memory is
+    bounded by `limit` rather than by the size of the stream. Ordering matches _select_by_cost.
+
+    Returns:
+        Tuple of (trace ids in cost order, number of traces read from the stream).
+    """
+    sign = 1 if sort_direction == "desc" else -1
+    ranked: List[tuple[float, int, Any]] = []
+    count = 0
+    for count, trace in enumerate(traces, 1):
+        # Higher entries rank first: cost in the requested direction, then earlier fetch order
+        entry = (sign * TraceProcessor.get_cost(trace, sort_by), -count, trace.get("id"))
+        if limit is None:
+            ranked.append(entry)
+        elif len(ranked) < limit:
+            heapq.heappush(ranked, entry)
+        elif entry > ranked[0]:
+            # Min-heap of the best `limit` entries seen so far; the weakest one is evicted
+            heapq.heapreplace(ranked, entry)
+    ranked.sort(reverse=True)
+    return [trace_id for _, _, trace_id in ranked if trace_id is not None], count
+
+
+def _order_by_ids(traces: List[Dict[str, Any]], ids: List[Any]) -> List[Dict[str, Any]]:
+    """Put traces in the order of `ids`; traces with other ids follow in their original order."""
+    if [trace.get("id") for trace in traces] == ids:
+        return traces
+
+    # Bucket by position instead of sorting; buckets keep duplicates in fetch order like a stable sort
+    id_to_index = {trace_id: i for i, trace_id in enumerate(ids)}
+    buckets: List[List[Dict[str, Any]]] = [[] for _ in ids]
+    unmatched: List[Dict[str, Any]] = []
+    for trace in traces:
+        index = id_to_index.get(trace.get("id"))
+        (unmatched if index is None else buckets[index]).append(trace)
+    return [trace for bucket in buckets for trace in bucket] + unmatched
+
 
 class TraceService:
     """Service for querying and processing Weave traces."""
 
     # Define cost fields once as a class constant
-    COST_FIELDS = {"total_cost", "completion_cost", "prompt_cost"}
+    COST_FIELDS = _COST_FIELDS
 
+    # The cost sort first pass scans COST_SORT_FIRST_PASS_FACTOR x the requested traces, at least
+    # COST_SORT_MIN_FIRST_PASS and never more than COST_SORT_MAX_FIRST_PASS
     COST_SORT_MAX_FIRST_PASS = 10_000
+    COST_SORT_MIN_FIRST_PASS = 5_000
+    COST_SORT_FIRST_PASS_FACTOR = 10
+
+    # The cost sort second pass fetches the selected call ids in chunks of this size, concurrently
+    COST_SORT_SECOND_PASS_CHUNK_SIZE = 100
+    COST_SORT_SECOND_PASS_MAX_WORKERS = 8
+
+    # Trace counts used to short-circuit the cost sort are reused for this long
+    TRACE_COUNT_CACHE_TTL_SECONDS = 30
+    TRACE_COUNT_CACHE_SIZE = 256
 
     # Define synthetic columns that shouldn't be passed to the API but can be reconstructed
     SYNTHETIC_COLUMNS = {"costs"}
 
     # Define latency field mapping
-    LATENCY_FIELD_MAPPING = {"latency_ms": "summary.weave.latency_ms"}
+    LATENCY_FIELD_MAPPING = {"latency_ms": _LATENCY_SUMMARY_FIELD}
 
     def __init__(
         self,
@@ -127,91 +238,116 @@ class TraceService:
                 set(),
             )  # Return None for filtered_columns_for_api if input is None
 
+        # Common case: only plain schema columns (never synthetic, never dotted), nothing to map or report
+        if VALID_COLUMNS.issuperset(columns) and _SYNTHETIC.isdisjoint(columns):
+            return list(dict.fromkeys(columns)), [], set()
+
         filtered_columns_for_api: list[str] = []
         requested_synthetic_columns: list[str] = []
         invalid_columns_reported: set[str] = set()
 
-        processed_columns = set()  # To avoid duplicate processing if a column is listed multiple times
+        # API columns are de-duplicated as they are added, preserving first-seen order
+        seen_api: set[str] = set()
+
+        def add_api_column(name: str) -> None:
+            if name not in seen_api:
+                seen_api.add(name)
+                filtered_columns_for_api.append(name)
+
+        processed_columns: set[str] = set()  # To avoid duplicate processing if a column is listed multiple times
+        mark_processed = processed_columns.add
 
         for col_name in columns:
             if col_name in processed_columns:
                 continue
-            processed_columns.add(col_name)
-
-            if col_name == "latency_ms":
-                # 'latency_ms' is synthetic, its data comes from 'summary.weave.latency_ms'
-                requested_synthetic_columns.append("latency_ms")
-                # Ensure the source field is requested from the API
-                source_field = self.LATENCY_FIELD_MAPPING["latency_ms"]
-                if source_field not in filtered_columns_for_api:
-                    filtered_columns_for_api.append(source_field)
-                # Also ensure 'summary' itself is added if not already, as 'summary.weave.latency_ms' implies 'summary'
-                if "summary" not in filtered_columns_for_api and source_field.startswith("summary."):
-                    filtered_columns_for_api.append("summary")
-                logger.info(
-                    f"Column 'latency_ms' requested: will be synthesized from '{source_field}'. Added '{source_field}' to API columns."
-                )
-
-            elif col_name == "costs":
-                # 'costs' is synthetic, its data comes from 'summary.weave.costs'
-                requested_synthetic_columns.append("costs")
-                # Ensure the source field ('summary') is requested
-                if "summary" not in filtered_columns_for_api:
-                    filtered_columns_for_api.append("summary")
-                logger.info(
-                    "Column 'costs' requested: will be synthesized from 'summary.weave.costs'. Added 'summary' to API columns."
-                )
-
-            elif col_name == "status":
-                # 'status' can be top-level or from 'summary.weave.status'
-                requested_synthetic_columns.append("status")
-                # Add 'status' to API columns to try fetching top-level first.
-                # If not present, it will be synthesized from summary.
-                if "status" not in filtered_columns_for_api:
-                    filtered_columns_for_api.append("status")
-                if "summary" not in filtered_columns_for_api:  # Also ensure summary for fallback
-                    filtered_columns_for_api.append("summary")
-                logger.info(
-                    "Column 'status' requested: will attempt direct fetch or synthesize from 'summary.weave.status'."
-                )
+            mark_processed(col_name)
+
+            if col_name in _SYNTHETIC:
+                requested_synthetic_columns.append(col_name)
+                if col_name == "latency_ms":
+                    # 'latency_ms' is synthetic, its data comes from 'summary.weave.latency_ms'
+                    source_field = _LATENCY_SUMMARY_FIELD
+                    # Ensure the source field is requested from the API
+                    add_api_column(source_field)
+                    # Also ensure 'summary' itself is added, as 'summary.weave.latency_ms' implies 'summary'
+                    if source_field.startswith("summary."):
+                        add_api_column("summary")
+                    logger.info(
+                        "Column 'latency_ms' requested: will be synthesized from '%s'. Added '%s' to API columns.",
+                        source_field,
+                        source_field,
+                    )
+                elif col_name == "costs":
+                    # 'costs' is synthetic, its data comes from 'summary.weave.costs'; request the 'summary' source
+                    add_api_column("summary")
+                    logger.info(
+                        "Column 'costs' requested: will be synthesized from 'summary.weave.costs'. Added 'summary' to API columns."
+                    )
+                else:
+                    # 'status' can be top-level or from 'summary.weave.status'. Request the top-level
+                    # column first; if not present, it will be synthesized from summary.
+                    add_api_column("status")
+                    add_api_column("summary")  # Also ensure summary for fallback
+                    logger.info(
+                        "Column 'status' requested: will attempt direct fetch or synthesize from 'summary.weave.status'."
+                    )
 
             elif col_name in VALID_COLUMNS:
                 # Direct valid column
-                if col_name not in filtered_columns_for_api:
-                    filtered_columns_for_api.append(col_name)
+                add_api_column(col_name)
 
             elif "." in col_name:  # Potentially a dot-separated path
                 base_field = col_name.split(".")[0]
                 if base_field in VALID_COLUMNS:
                     # Valid nested field (e.g., "summary.weave.latency_ms", "attributes.foo")
-                    if col_name not in filtered_columns_for_api:
-                        filtered_columns_for_api.append(col_name)
-                    logger.info(f"Nested column field '{col_name}' requested, added to API columns.")
+                    add_api_column(col_name)
+                    logger.info("Nested column field '%s' requested, added to API columns.", col_name)
                 else:
                     logger.warning(
-                        f"Invalid base field '{base_field}' in nested column '{col_name}'. It will be ignored."
+                        "Invalid base field '%s' in nested column '%s'. It will be ignored.", base_field, col_name
                     )
                     invalid_columns_reported.add(col_name)
             else:
                 # Neither a direct valid column, nor a recognized synthetic, nor a valid-looking nested path
-                logger.warning(f"Invalid column '{col_name}' requested. It will be ignored.")
+                logger.warning("Invalid column '%s' requested. It will be ignored.", col_name)
                 invalid_columns_reported.add(col_name)
 
-        # Ensure filtered_columns_for_api does not have duplicates and maintains order as much as possible
-        # (though order to the API might not matter as much as presence)
-        final_filtered_columns_for_api = []
-        seen_in_final = set()
-        for fc in filtered_columns_for_api:
-            if fc not in seen_in_final:
-                final_filtered_columns_for_api.append(fc)
-                seen_in_final.add(fc)
-
         return (
-            final_filtered_columns_for_api,
+            filtered_columns_for_api,
             requested_synthetic_columns,
             invalid_columns_reported,
         )
 
+    def _resolve_sort_field(self, sort_by: str) -> tuple[str, bool]:
+        """Map a requested sort field to the field the server should sort by.
+
+        Args:
+            sort_by: Requested sort field.
+
+        Returns:
+            Tuple of (server_sort_by, client_side_cost_sort). Cost fields are fetched in
+            'started_at' order and sorted client-side; invalid fields fall back to 'started_at'.
+        """
+        resolved = _SORT_FIELD_OVERRIDES.get(sort_by)
+        if resolved is not None:
+            if not resolved[1]:
+                logger.info("Mapping sort field '%s' to '%s'", sort_by, resolved[0])
+            return resolved
+
+        base_field, dot, _ = sort_by.partition(".")
+        if base_field in VALID_COLUMNS:
+            if dot:
+                logger.info("Using nested sort field for server: %s", sort_by)
+            return sort_by, False
+
+        if dot:
+            logger.warning(
+                "Invalid base field '%s' in sort_by '%s', falling back to 'started_at'.", base_field, sort_by
+            )
+        else:
+            logger.warning("Invalid sort field '%s', falling back to 'started_at'.", sort_by)
+        return "started_at", False
+
     def _ensure_required_columns_for_synthetic(
         self,
         filtered_columns: Optional[List[str]],
@@ -245,71 +381,103 @@ class TraceService:
     def _add_synthetic_columns(
         self,
         traces: List[Dict[str, Any]],
-        requested_synthetic_columns: List[str],
+        requested_synthetic_columns: Collection[str],
         invalid_columns: Set[str],
+        extra_synthetic_fields: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
         """Add synthetic columns back to the traces and add warnings for invalid columns.
 
+        The traces are freshly decoded API results owned by the caller, so they are updated
+        in place in a single pass and the same list is returned.
+
         Args:
             traces: List of trace dictionaries.
-            requested_synthetic_columns: List of requested synthetic columns.
+            requested_synthetic_columns: Requested synthetic columns (any collection).
             invalid_columns: Set of invalid column names that were requested.
+            extra_synthetic_fields: Fields to fill in with TraceProcessor.synthesize_fields
+                when a trace does not already have them.
 
         Returns:
             Updated traces with synthetic columns added and invalid column warnings.
         """
-        if not requested_synthetic_columns and not invalid_columns:
+        if not requested_synthetic_columns and not invalid_columns and not extra_synthetic_fields:
             return traces
 
-        updated_traces = []
+        # Decide once which synthetic columns are wanted instead of re-testing per trace
+        requested = frozenset(requested_synthetic_columns)
+        needs_costs = "costs" in requested
+        needs_status = "status" in requested
+        needs_latency = "latency_ms" in requested
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        # Trace ids missing each synthetic column, reported once per batch rather than once per trace
+        missing_ids: Dict[str, List[Any]] = {"costs": [], "status": [], "latency_ms": []}
+        # Invalid column warnings don't depend on the trace, so the payload is built once and merged in
+        invalid_payload = {col: f"{col} is not a valid column name, no data returned" for col in invalid_columns}
 
         for trace in traces:
-            updated_trace = trace.copy()
+            # Values the API already returned are kept; only missing ones come from the summary
+            status = trace.get("status") if needs_status else None
+            latency = trace.get("latency_ms") if needs_latency else None
+            missing_status = needs_status and not status
+            missing_latency = needs_latency and latency is None
+
+            # Resolve summary.weave once, and only if some synthetic column actually needs it
+            weave_summary = {}
+            if needs_costs or missing_status or missing_latency:
+                summary = trace.get("summary")
+                weave_summary = summary.get("weave") if isinstance(summary, dict) else None
+                if not isinstance(weave_summary, dict):
+                    weave_summary = {}
 
             # Add costs data if requested
-            if "costs" in requested_synthetic_columns:
-                costs_data = trace.get("summary", {}).get("weave", {}).get("costs", {})
+            if needs_costs:
+                costs_data = weave_summary.get("costs", {})
                 if costs_data:
-                    logger.debug(f"Adding synthetic 'costs' column with {len(costs_data)} providers")
-                    updated_trace["costs"] = costs_data
+                    if debug_enabled:
+                        logger.debug("Adding synthetic 'costs' column with %d providers", len(costs_data))
+                    trace["costs"] = costs_data
+                else:
+                    missing_ids["costs"].append(trace.get("id"))
+                    trace["costs"] = {}
+
+            # Add status from summary.weave.status if requested and not already in the trace
+            if missing_status:
+                status = weave_summary.get("status")
+                if status:
+                    logger.debug("Adding synthetic 'status' from summary: %s", status)
+                    trace["status"] = status
+                else:
+                    missing_ids["status"].append(trace.get("id"))
+                    trace["status"] = None
+
+            # Add latency_ms from summary.weave.latency_ms if requested and not already in the trace
+            if missing_latency:
+                latency = weave_summary.get("latency_ms")
+                if latency is not None:
+                    logger.debug("Adding synthetic 'latency_ms' from summary: %s", latency)
+                    trace["latency_ms"] = latency
                 else:
-                    logger.warning(f"No costs data found in trace {trace.get('id')}")
-                    updated_trace["costs"] = {}
-
-            # Add status from summary if requested
-            if "status" in requested_synthetic_columns:
-                status = trace.get("status")  # Check if it's already in the trace
-                if not status:
-                    # Extract from summary.weave.status
-                    status = trace.get("summary", {}).get("weave", {}).get("status")
-                    if status:
-                        logger.debug(f"Adding synthetic 'status' from summary: {status}")
-                        updated_trace["status"] = status
-                    else:
-                        logger.warning(f"No status data found in trace {trace.get('id')}")
-                        updated_trace["status"] = None
-
-            # Add latency_ms from summary if requested
-            if "latency_ms" in requested_synthetic_columns:
-                latency = trace.get("latency_ms")  # Check if it's already in the trace
-                if latency is None:
-                    # Extract from summary.weave.latency_ms
-                    latency = trace.get("summary", {}).get("weave", {}).get("latency_ms")
-                    if latency is not None:
-                        logger.debug(f"Adding synthetic 'latency_ms' from summary: {latency}")
-                        updated_trace["latency_ms"] = latency
-                    else:
-                        logger.warning(f"No latency_ms data found in trace {trace.get('id')}")
-                        updated_trace["latency_ms"] = None
+                    missing_ids["latency_ms"].append(trace.get("id"))
+                    trace["latency_ms"] = None
 
             # Add warnings for invalid columns
-            for col in invalid_columns:
-                warning_message = f"{col} is not a valid column name, no data returned"
-                updated_trace[col] = warning_message
+            if invalid_payload:
+                trace.update(invalid_payload)
 
-            updated_traces.append(updated_trace)
+            if extra_synthetic_fields:
+                TraceProcessor.synthesize_fields(trace, extra_synthetic_fields, in_place=True)
 
-        return updated_traces
+        for col, ids in missing_ids.items():
+            if ids:
+                logger.warning(
+                    "No %s data found in %d of %d traces (first ids: %s)",
+                    col,
+                    len(ids),
+                    len(traces),
+                    ids[:_MISSING_IDS_PREVIEW],
+                )
+
+        return traces
 
     def query_traces(
         self,
@@ -352,43 +520,11 @@ class TraceService:
         # Clear invalid columns from previous requests
         self.invalid_columns = set()
 
-        # Special handling for cost-based sorting
-        client_side_cost_sort = sort_by in self.COST_FIELDS
-
-        # Handle latency field mapping
-        if sort_by in self.LATENCY_FIELD_MAPPING:
-            logger.info(f"Mapping sort field '{sort_by}' to '{self.LATENCY_FIELD_MAPPING[sort_by]}'")
-            server_sort_by = self.LATENCY_FIELD_MAPPING[sort_by]
-            server_sort_direction = sort_direction
-        elif client_side_cost_sort:
+        # Resolve the server sort field; cost fields are sorted client-side
+        server_sort_by, client_side_cost_sort = self._resolve_sort_field(sort_by)
+        server_sort_direction = sort_direction
+        if client_side_cost_sort:
             include_costs = True
-            server_sort_by = "started_at"
-            server_sort_direction = sort_direction
-        elif sort_by == "latency_ms":  # Added specific handling for latency_ms sort
-            logger.info(
-                f"Sort by 'latency_ms' requested. Will sort by server field '{self.LATENCY_FIELD_MAPPING['latency_ms']}'."
-            )
-            server_sort_by = self.LATENCY_FIELD_MAPPING["latency_ms"]
-            server_sort_direction = sort_direction
-        elif "." in sort_by:  # Handles general dot-separated paths
-            base_field = sort_by.split(".")[0]
-            if base_field in VALID_COLUMNS:
-                logger.info(f"Using nested sort field for server: {sort_by}")
-                server_sort_by = sort_by
-                server_sort_direction = sort_direction
-            else:
-                logger.warning(
-                    f"Invalid base field '{base_field}' in sort_by '{sort_by}', falling back to 'started_at'."
-                )
-                server_sort_by = "started_at"
-                server_sort_direction = sort_direction
-        elif sort_by not in VALID_COLUMNS:
-            logger.warning(f"Invalid sort field '{sort_by}', falling back to 'started_at'.")
-            server_sort_by = "started_at"
-            server_sort_direction = sort_direction
-        else:  # sort_by is in VALID_COLUMNS and not a special case
-            server_sort_by = sort_by
-            server_sort_direction = sort_direction
 
         # Validate and filter columns using CallSchema
         filtered_api_columns, rs_columns, inv_columns = self._validate_and_filter_columns(columns)
@@ -407,31 +543,23 @@ class TraceService:
         # Ensure required columns for synthetic fields are included - This is also largely handled by _validate_and_filter_columns logic
         # filtered_api_columns = self._ensure_required_columns_for_synthetic(filtered_api_columns, rs_columns)
 
-        # Prepare query parameters
-        query_params = {
-            "entity_name": entity_name,
-            "project_name": project_name,
-            "filters": filters or {},
-            "sort_by": server_sort_by,
-            "sort_direction": server_sort_direction,
-            "limit": None if client_side_cost_sort else limit,  # No limit if we're sorting by cost
-            "offset": offset,
-            "include_costs": include_costs,
-            "include_feedback": include_feedback,
-            "columns": filtered_api_columns,  # Use the columns intended for the API
-            "expand_columns": expand_columns,
-        }
-
-        # Build request body
-        request_body = QueryBuilder.prepare_query_params(query_params)
-
-        # Extract synthetic fields if any were specified
-        synthetic_fields = request_body.pop("_synthetic_fields", []) if "_synthetic_fields" in request_body else []
+        # Build request body and the synthetic fields the query builder flagged
+        request_body, synthetic_fields = QueryBuilder.prepare_query_params_kw(
+            entity_name=entity_name,
+            project_name=project_name,
+            filters=filters or {},
+            sort_by=server_sort_by,
+            sort_direction=server_sort_direction,
+            limit=None if client_side_cost_sort else limit,  # No limit if we're sorting by cost
+            offset=offset,
+            include_costs=include_costs,
+            include_feedback=include_feedback,
+            columns=filtered_api_columns,  # Use the columns intended for the API
+            expand_columns=expand_columns,
+        )
 
-        # Make sure all requested synthetic columns are included in synthetic_fields
-        for col in rs_columns:  # Use rs_columns
-            if col not in synthetic_fields:
-                synthetic_fields.append(col)
+        # Make sure all requested synthetic columns are included in synthetic_fields, keeping order
+        synthetic_fields = _merge_synthetic_fields(synthetic_fields, rs_columns)
 
         # Execute query with memory guard
         all_traces = []
@@ -440,34 +568,25 @@ class TraceService:
             trace_size = sys.getsizeof(str(trace))
             if accumulated_bytes + trace_size > MAX_ACCUMULATED_BYTES:
                 logger.warning(
-                    f"Memory guard: stopping at {len(all_traces)} traces "
-                    f"({accumulated_bytes / 1024 / 1024:.0f}MB). "
-                    f"Use filters or detail_level='schema' to reduce data."
+                    "Memory guard: stopping at %d traces (%.0fMB). "
+                    "Use filters or detail_level='schema' to reduce data.",
+                    len(all_traces),
+                    accumulated_bytes / 1024 / 1024,
                 )
                 break
             all_traces.append(trace)
             accumulated_bytes += trace_size
 
-        # Add synthetic columns and invalid column warnings back to the results
-        if rs_columns or inv_columns:  # Use corrected variables
-            all_traces = self._add_synthetic_columns(all_traces, rs_columns, inv_columns)
+        # Add synthetic columns, synthesized fields and invalid column warnings back to the results
+        if rs_columns or inv_columns or synthetic_fields:
+            if synthetic_fields:
+                logger.info("Synthesizing fields: %s", synthetic_fields)
+            all_traces = self._add_synthetic_columns(all_traces, rs_columns, inv_columns, synthetic_fields)
 
         # Client-side cost-based sorting if needed
         if client_side_cost_sort and all_traces:
-            logger.info(f"Performing client-side sorting by {sort_by}")
-            # Sort traces by cost
-            all_traces.sort(
-                key=lambda t: TraceProcessor.get_cost(t, sort_by),
-                reverse=(sort_direction == "desc"),
-            )
-            # Apply limit if specified
-            if limit is not None:
-                all_traces = all_traces[:limit]
-
-        # If we need to synthesize fields, do it
-        if synthetic_fields:
-            logger.info(f"Synthesizing fields: {synthetic_fields}")
-            all_traces = [TraceProcessor.synthesize_fields(trace, synthetic_fields) for trace in all_traces]
+            logger.info("Performing client-side sorting by %s", sort_by)
+            all_traces = _select_by_cost(all_traces, sort_by, sort_direction, limit)
 
         # Process traces
         result = TraceProcessor.process_traces(
@@ -542,7 +661,7 @@ class TraceService:
         Args:
             entity_name: Weights & Biases entity name.
             project_name: Weights & Biands project name.
-            chunk_size: Number of traces to retrieve in each chunk.
+            chunk_size: Unused; traces are streamed from a single request. Kept for compatibility.
             filters: Dictionary of filter conditions.
             sort_by: Field to sort by.
             sort_direction: Sort direction ('asc' or 'desc').
@@ -560,27 +679,8 @@ class TraceService:
         """
         self.invalid_columns = set()
 
-        # Special handling for cost-based sorting
-        client_side_cost_sort = sort_by in self.COST_FIELDS
-
-        # Determine effective_sort_by for the server
-        effective_sort_by = "started_at"  # Default
-        if sort_by == "latency_ms":
-            effective_sort_by = self.LATENCY_FIELD_MAPPING["latency_ms"]
-            logger.info(f"Paginated sort by 'latency_ms', server will use '{effective_sort_by}'.")
-        elif "." in sort_by:
-            base_field = sort_by.split(".")[0]
-            if base_field in VALID_COLUMNS:
-                effective_sort_by = sort_by
-                logger.info(f"Paginated sort by nested field '{sort_by}', server will use it directly.")
-            else:
-                logger.warning(f"Paginated sort by invalid nested field '{sort_by}', defaulting to 'started_at'.")
-        elif (
-            sort_by in VALID_COLUMNS and sort_by not in self.COST_FIELDS
-        ):  # Exclude COST_FIELDS as they are client-sorted
-            effective_sort_by = sort_by
-        elif sort_by not in self.COST_FIELDS:  # If not valid and not cost, warn and default
-            logger.warning(f"Paginated sort by invalid field '{sort_by}', defaulting to 'started_at'.")
+        # Resolve the server sort field; cost fields are sorted client-side
+        effective_sort_by, client_side_cost_sort = self._resolve_sort_field(sort_by)
 
         # Validate and filter columns using CallSchema
         # Pass the original 'columns'
@@ -597,7 +697,7 @@ class TraceService:
         # filtered_api_columns = self._ensure_required_columns_for_synthetic(filtered_api_columns, rs_columns)
 
         if client_side_cost_sort:
-            logger.info(f"Cost-based sorting detected: {sort_by}")
+            logger.info("Cost-based sorting detected: %s", sort_by)
             all_traces = self._query_for_cost_sorting(
                 entity_name=entity_name,
                 project_name=project_name,
@@ -613,52 +713,49 @@ class TraceService:
                 invalid_columns=inv_columns,  # Pass invalid columns
             )
         else:
-            # Normal paginated query logic
-            all_traces = []
-            current_offset = 0
-
-            while True:
-                logger.info(f"Querying chunk with offset {current_offset}, size {chunk_size}")
-                remaining = target_limit - len(all_traces) if target_limit else chunk_size
-                current_chunk_size = min(chunk_size, remaining) if target_limit else chunk_size
-
-                chunk_result = self.query_traces(
-                    entity_name=entity_name,
-                    project_name=project_name,
-                    filters=filters,
-                    sort_by=effective_sort_by,
-                    sort_direction=sort_direction,
-                    limit=current_chunk_size,
-                    offset=current_offset,
-                    include_costs=include_costs,
-                    include_feedback=include_feedback,
-                    columns=columns,  # Pass original 'columns' here, query_traces will validate and filter.
-                    # This ensures that if 'latency_ms' was requested, it's handled correctly
-                    # by the nested call to _validate_and_filter_columns inside query_traces.
-                    expand_columns=expand_columns,
-                    return_full_data=True,  # We want raw data for now
-                    metadata_only=False,
-                )
+            # Normal query logic. /calls/stream_query already streams results, so the traces are
+            # read from a single request and the generator is cut off at target_limit instead
+            # of issuing one offset/limit request per chunk.
+            request_body, synthetic_fields = QueryBuilder.prepare_query_params_kw(
+                entity_name=entity_name,
+                project_name=project_name,
+                filters=filters or {},
+                sort_by=effective_sort_by,
+                sort_direction=sort_direction,
+                limit=target_limit or None,
+                offset=0,
+                include_costs=include_costs,
+                include_feedback=include_feedback,
+                columns=filtered_api_columns,
+                expand_columns=expand_columns,
+            )
 
-                # Get the traces from the QueryResult and handle both None and empty list cases
-                traces_from_chunk = chunk_result.traces if chunk_result and chunk_result.traces else []
-                if not traces_from_chunk:
-                    break
+            # Synthetic fields flagged by the query builder plus the ones requested explicitly
+            synthetic_fields = _merge_synthetic_fields(synthetic_fields, rs_columns)
 
-                all_traces.extend(traces_from_chunk)
+            trace_stream = self.client.query_traces(request_body)
+            if target_limit:
+                trace_stream = islice(trace_stream, target_limit)
 
-                accumulated = sys.getsizeof(str(all_traces))
-                if accumulated > MAX_ACCUMULATED_BYTES:
+            all_traces = []
+            accumulated_bytes = 0
+            for trace in trace_stream:
+                trace_size = sys.getsizeof(str(trace))
+                if accumulated_bytes + trace_size > MAX_ACCUMULATED_BYTES:
                     logger.warning(
-                        f"Memory guard (paginated): stopping at {len(all_traces)} traces "
-                        f"({accumulated / 1024 / 1024:.0f}MB)."
+                        "Memory guard (paginated): stopping at %d traces (%.0fMB).",
+                        len(all_traces),
+                        accumulated_bytes / 1024 / 1024,
                     )
                     break
+                all_traces.append(trace)
+                accumulated_bytes += trace_size
 
-                if len(traces_from_chunk) < current_chunk_size or (target_limit and len(all_traces) >= target_limit):
-                    break
-
-                current_offset += chunk_size
+            # Post-process the accumulated traces in one pass
+            if rs_columns or inv_columns or synthetic_fields:
+                if synthetic_fields:
+                    logger.info("Synthesizing fields: %s", synthetic_fields)
+                all_traces = self._add_synthetic_columns(all_traces, rs_columns, inv_columns, synthetic_fields)
 
         # Process all traces at once with appropriate parameters
         if target_limit and all_traces:
@@ -670,10 +767,48 @@ class TraceService:
             return_full_data=return_full_data,
             metadata_only=metadata_only,
         )
-        logger.debug(f"Final result from query_paginated_traces:\n\n{len(result.model_dump_json(indent=2))}\n")
+        # Serializing the whole result just to log its size is only worth it when DEBUG is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Final result from query_paginated_traces:\n\n%d\n", len(result.model_dump_json(indent=2)))
         assert isinstance(result, QueryResult), f"Result type must be a QueryResult, found: {type(result)}"
         return result
 
+    def _count_matching_traces(self, request_body: Dict[str, Any]) -> Optional[int]:
+        """Number of traces matching a request's project and filters, or None if it can't be counted.
+
+        Counts are cached for TRACE_COUNT_CACHE_TTL_SECONDS so repeated queries don't pay for them again.
+        """
+        stats_body = {key: request_body[key] for key in ("project_id", "filter", "query") if key in request_body}
+        # The count only steers how the query is executed, never what the caller gets to see
+        cache_key = f"{self.client.server_url}|{json.dumps(stats_body, sort_keys=True, default=str)}"
+        now = time.monotonic()
+        with _TRACE_COUNT_CACHE_LOCK:
+            cached = _TRACE_COUNT_CACHE.get(cache_key)
+        if cached is not None and now - cached[0] < self.TRACE_COUNT_CACHE_TTL_SECONDS:
+            return cached[1]
+
+        try:
+            count = self.client.count_traces(stats_body)
+        except Exception as e:
+            logger.warning("Could not count matching traces, falling back to the two-pass cost sort: %s", e)
+            return None
+
+        # Paginated queries run in worker threads, so concurrent queries may update the cache together
+        with _TRACE_COUNT_CACHE_LOCK:
+            # Re-insert refreshed entries at the end so the dict stays ordered oldest first
+            _TRACE_COUNT_CACHE.pop(cache_key, None)
+            if len(_TRACE_COUNT_CACHE) >= self.TRACE_COUNT_CACHE_SIZE:
+                del _TRACE_COUNT_CACHE[next(iter(_TRACE_COUNT_CACHE))]
+            _TRACE_COUNT_CACHE[cache_key] = (now, count)
+        return count
+
+    def _cost_sort_first_pass_limit(self, target_limit: Optional[int]) -> int:
+        """Number of recent traces the cost sort first pass scans for a given result limit."""
+        if not target_limit:
+            return self.COST_SORT_MAX_FIRST_PASS
+        scaled = max(target_limit * self.COST_SORT_FIRST_PASS_FACTOR, self.COST_SORT_MIN_FIRST_PASS)
+        return min(scaled, self.COST_SORT_MAX_FIRST_PASS)
+
     def _query_for_cost_sorting(
         self,
         entity_name: str,
@@ -711,73 +846,102 @@ class TraceService:
         if invalid_columns is None:
             invalid_columns = set()
 
+        first_pass_cap = self._cost_sort_first_pass_limit(target_limit)
         first_pass_query = {
             "entity_name": entity_name,
             "project_name": project_name,
             "filters": filters or {},
             "sort_by": "started_at",
             "sort_direction": "desc",
-            "limit": self.COST_SORT_MAX_FIRST_PASS,
+            "limit": first_pass_cap,
             "include_costs": True,
             "include_feedback": False,
-            "columns": ["id", "summary"],
+            # Only the cost breakdown is read; servers that project nested columns send just that subtree
+            "columns": ["id", QueryBuilder.COST_SUMMARY_PATH],
         }
 
         first_pass_request = QueryBuilder.prepare_query_params(first_pass_query)
-        first_pass_results = list(self.client.query_traces(first_pass_request))
 
-        logger.info(f"First pass of cost sorting request retrieved {len(first_pass_results)} traces")
-        if len(first_pass_results) >= self.COST_SORT_MAX_FIRST_PASS:
-            logger.warning(
-                f"Cost sort first pass hit cap of {self.COST_SORT_MAX_FIRST_PASS} traces. "
-                "Results may not include the most/least expensive traces. "
-                "Add filters to narrow the scope."
-            )
+        # Full trace details; the second pass narrows this query down to the selected call ids
+        detail_query = {
+            "entity_name": entity_name,
+            "project_name": project_name,
+            "include_costs": include_costs,
+            "include_feedback": include_feedback,
+            "columns": columns,
+            "expand_columns": expand_columns,
+        }
 
-        # Filter and sort by cost
-        filtered_results = [t for t in first_pass_results if TraceProcessor.get_cost(t, sort_by) is not None]
+        # Make sure we request summary if costs were requested, without mutating the caller's columns
+        if requested_synthetic_columns and "costs" in requested_synthetic_columns and "summary" not in (columns or ()):
+            detail_query["columns"] = [*(columns or ()), "summary"]
+            logger.info("Added 'summary' to columns for cost data retrieval")
+
+        # When every matching trace fits in the result, one detailed fetch sorted locally replaces
+        # both passes. The detailed rows need the cost breakdown for that, i.e. the summary column.
+        if target_limit and (not detail_query["columns"] or "summary" in detail_query["columns"]):
+            trace_count = self._count_matching_traces(first_pass_request)
+            if trace_count is not None and trace_count <= target_limit:
+                logger.info("Cost sort: %d matching traces fit the limit, fetching them in one pass", trace_count)
+                # Same recency order as the first pass; target_limit still bounds the fetch if the
+                # cached count is stale and more traces have arrived since
+                single_pass_request = QueryBuilder.prepare_query_params(
+                    {
+                        **detail_query,
+                        "filters": filters or {},
+                        "sort_by": "started_at",
+                        "sort_direction": "desc",
+                        "limit": target_limit,
+                    }
+                )
+                results = _select_by_cost(
+                    list(self.client.query_traces(single_pass_request)), sort_by, sort_direction, target_limit
+                )
+                if requested_synthetic_columns or invalid_columns:
+                    results = self._add_synthetic_columns(results, requested_synthetic_columns or [], invalid_columns)
+                return results
 
-        filtered_results.sort(
-            key=lambda t: TraceProcessor.get_cost(t, sort_by),
-            reverse=(sort_direction == "desc"),
+        # Get the IDs of the top N traces by cost as the first pass streams in
+        top_ids, first_pass_count = _stream_top_ids_by_cost(
+            self.client.query_traces(first_pass_request), sort_by, sort_direction, target_limit or None
         )
 
-        # Get the IDs of the top N traces
-        top_ids = (
-            [t["id"] for t in filtered_results[:target_limit] if "id" in t]
-            if target_limit
-            else [t["id"] for t in filtered_results if "id" in t]
-        )
+        logger.info("First pass of cost sorting request retrieved %d traces", first_pass_count)
+        if first_pass_count >= first_pass_cap:
+            logger.warning(
+                "Cost sort first pass hit cap of %d traces. "
+                "Results may not include the most/least expensive traces. "
+                "Add filters to narrow the scope.",
+                first_pass_cap,
+            )
 
-        logger.info(f"After sorting by {sort_by}, selected {len(top_ids)} trace IDs")
+        logger.info("After sorting by %s, selected %d trace IDs", sort_by, len(top_ids))
 
         if not top_ids:
             return []
 
         # Second pass: Fetch the full details for the selected traces
-        second_pass_query = {
-            "entity_name": entity_name,
-            "project_name": project_name,
-            "filters": {"call_ids": top_ids},
-            "include_costs": include_costs,
-            "include_feedback": include_feedback,
-            "columns": columns,
-            "expand_columns": expand_columns,
-        }
+        second_pass_query = {**detail_query, "filters": {"call_ids": top_ids}}
 
-        # Make sure we request summary if costs were requested
-        if requested_synthetic_columns and "costs" in requested_synthetic_columns:
-            if not columns or "summary" not in columns:
-                if not second_pass_query["columns"]:
-                    second_pass_query["columns"] = ["summary"]
-                elif "summary" not in second_pass_query["columns"]:
-                    second_pass_query["columns"].append("summary")
-                logger.info("Added 'summary' to columns for cost data retrieval")
-
-        second_pass_request = QueryBuilder.prepare_query_params(second_pass_query)
-        second_pass_results = list(self.client.query_traces(second_pass_request))
+        chunk_size = self.COST_SORT_SECOND_PASS_CHUNK_SIZE
+        if len(top_ids) <= chunk_size:
+            second_pass_request = QueryBuilder.prepare_query_params(second_pass_query)
+            second_pass_results = list(self.client.query_traces(second_pass_request))
+        else:
+            # One huge call_ids filter makes a single slow response; smaller chunks overlap their latency
+            chunk_requests = [
+                QueryBuilder.prepare_query_params(
+                    {**second_pass_query, "filters": {"call_ids": top_ids[i : i + chunk_size]}}
+                )
+                for i in range(0, len(top_ids), chunk_size)
+            ]
+            max_workers = min(self.COST_SORT_SECOND_PASS_MAX_WORKERS, len(chunk_requests))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # query_traces is a lazy generator, so each worker drains its own stream
+                chunk_results = executor.map(lambda request: list(self.client.query_traces(request)), chunk_requests)
+                second_pass_results = [trace for chunk in chunk_results for trace in chunk]
 
-        logger.info(f"Second pass retrieved {len(second_pass_results)} traces")
+        logger.info("Second pass retrieved %d traces", len(second_pass_results))
 
         # Add synthetic columns and invalid column warnings back to the results
         if requested_synthetic_columns or invalid_columns:
@@ -788,7 +952,6 @@ class TraceService:
             )
 
         # Ensure the results are in the same order as the IDs
-        id_to_index = {id: i for i, id in enumerate(top_ids)}
-        second_pass_results.sort(key=lambda t: id_to_index.get(t.get("id"), float("inf")))
+        second_pass_results = _order_by_ids(second_pass_results, top_ids)
 
         return second_pass_results
@@ -8,6 +8,7 @@ import pytest
 
 from wandb_mcp_server.mcp_tools.docs_search import (
     SEARCH_WANDB_DOCS_TOOL_DESCRIPTION,
+    _first_sse_data,
     is_docs_proxy_enabled,
     search_wandb_docs,
 )
@@ -45,6 +46,19 @@ class TestDocsProxyEnabled:
             assert is_docs_proxy_enabled() is True
 
 
+class TestFirstSseData:
+    def test_returns_first_parseable_data_line(self):
+        body = 'event: message\ndata: not json\ndata: {"result": 1}\ndata: {"result": 2}\n'
+        assert _first_sse_data(body) == {"result": 1}
+
+    def test_data_line_at_start_and_without_trailing_newline(self):
+        assert _first_sse_data('data: {"result": 1}') == {"result": 1}
+
+    def test_no_data_lines(self):
+        assert _first_sse_data('{"result": 1}') is None
+        assert _first_sse_data("") is None
+
+
 class TestSearchWandBDocs:
     @pytest.mark.asyncio
     @patch("wandb_mcp_server.mcp_tools.docs_search.httpx.AsyncClient")
@@ -60,6 +74,7 @@ class TestSearchWandBDocs:
                 ]
             }
         }
+        mock_response.text = json.dumps(mock_response.json.return_value)
 
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
@@ -71,6 +86,18 @@ class TestSearchWandBDocs:
         assert "weave.Scorer" in result
         assert "---" in result
 
+        posted = mock_client.post.call_args.kwargs
+        assert posted["json"] == {
+            "jsonrpc": "2.0",
+            "method": "tools/call",
+            "params": {
+                "name": "search_weights_biases_documentation",
+                "arguments": {"query": "How to create a Weave scorer"},
+            },
+            "id": 1,
+        }
+        assert posted["headers"]["Accept"] == "application/json, text/event-stream"
+
     @pytest.mark.asyncio
     @patch("wandb_mcp_server.mcp_tools.docs_search.httpx.AsyncClient")
     async def test_empty_results(self, mock_client_cls):
@@ -78,6 +105,7 @@ class TestSearchWandBDocs:
         mock_response.status_code = 200
         mock_response.raise_for_status = MagicMock()
         mock_response.json.return_value = {"result": {"content": []}}
+        mock_response.text = json.dumps(mock_response.json.return_value)
 
         mock_client = AsyncMock()
         mock_client.post.return_value = mock_response
@@ -79,3 +79,28 @@ class TestErrorFormatStandardization:
 
         with pytest.raises(Exception):
             count_traces(entity_name="test", project_name="test")
+
+
+class TestPaginatedQueryOffEventLoop:
+    """The blocking trace service call must not run on the event loop thread."""
+
+    @pytest.mark.asyncio
+    @patch("wandb_mcp_server.mcp_tools.query_weave.WandBApiManager")
+    @patch("wandb_mcp_server.mcp_tools.query_weave.get_trace_service")
+    async def test_service_runs_in_worker_thread(self, mock_get_service, _mock_api_mgr):
+        import threading
+
+        from wandb_mcp_server.mcp_tools.query_weave import query_paginated_weave_traces
+
+        loop_thread = threading.get_ident()
+        call_threads = []
+
+        def fake_query(**kwargs):
+            call_threads.append(threading.get_ident())
+            return QueryResult(metadata=TraceMetadata(total_traces=0), traces=[])
+
+        mock_get_service.return_value.query_paginated_traces.side_effect = fake_query
+
+        result = await query_paginated_weave_traces(entity_name="e", project_name="p", target_limit=1)
+        assert isinstance(result, QueryResult)
+        assert call_threads and call_threads[0] != loop_thread
@@ -15,10 +15,13 @@ import requests
 from wandb_mcp_server.weave_api.client import WeaveApiClient
 from wandb_mcp_server.weave_api.models import (
     FilterOperator,
+    QueryFilter,
+    QueryParams,
     QueryResult,
 )
 from wandb_mcp_server.weave_api.processors import TraceProcessor
 from wandb_mcp_server.weave_api.query_builder import QueryBuilder
+from wandb_mcp_server.weave_api.service import _TRACE_COUNT_CACHE, TraceService
 
 
 # ---------------------------------------------------------------------------
@@ -150,6 +153,12 @@ class TestTraceProcessor(unittest.TestCase):
         assert TraceProcessor.get_cost(trace, "invalid_cost") == 0.0
         assert TraceProcessor.get_cost({}, "total_cost") == 0.0
 
+    def test_get_cost_falls_back_to_summary(self):
+        trace = {"summary": {"weave": {"costs": {"gpt-4": {"total_cost": 1.5}}}}}
+        assert TraceProcessor.get_cost(trace, "total_cost") == 1.5
+        assert TraceProcessor.get_cost({"summary": None}, "total_cost") == 0.0
+        assert TraceProcessor.get_cost({"costs": {}, **trace}, "total_cost") == 0.0
+
 
 # ---------------------------------------------------------------------------
 # QueryBuilder tests
@@ -165,12 +174,30 @@ class TestQueryBuilder(unittest.TestCase):
         assert QueryBuilder.datetime_to_timestamp("invalid_datetime") == 0
         assert QueryBuilder.datetime_to_timestamp("") == 0
 
+    def test_datetime_to_timestamp_is_memoized(self):
+        from wandb_mcp_server.weave_api.query_builder import _iso_to_timestamp
+
+        _iso_to_timestamp.cache_clear()
+        for _ in range(3):
+            assert QueryBuilder.datetime_to_timestamp("2024-06-01T12:00:00Z") == 1717243200
+        info = _iso_to_timestamp.cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+
     def test_separate_filters(self):
         filters = {"trace_roots_only": True, "op_name": "test_op", "status": "success", "latency": {"$gt": 1000}}
         direct, complex_f = QueryBuilder.separate_filters(filters)
         assert direct == {"trace_roots_only": True, "op_names": ["test_op"]}
         assert complex_f == {"status": "success", "latency": {"$gt": 1000}}
 
+    def test_separate_filters_with_explicit_op_names(self):
+        direct, complex_f = QueryBuilder.separate_filters({"op_names": ["a", "b"], "op_name": "b"})
+        assert direct == {"op_names": ["a", "b"]}
+        assert complex_f == {}
+
+        direct, complex_f = QueryBuilder.separate_filters({"op_names": ["a"], "op_name": "c"})
+        assert complex_f == {"op_name": "c"}
+
     def test_separate_filters_with_trace_id(self):
         direct, complex_f = QueryBuilder.separate_filters({"trace_id": "123"})
         assert direct == {"trace_ids": ["123"]}
@@ -202,6 +229,56 @@ class TestQueryBuilder(unittest.TestCase):
         assert "query" in result
         assert result["sort_by"] == [{"field": "started_at", "direction": "desc"}]
         assert result["limit"] == 10
+        assert result["columns"] == ["id", "op_name", "summary"]
+        assert result["_synthetic_fields"] == ["status"]
+
+    def test_prepare_query_params_from_dataclasses(self):
+        params = QueryParams(
+            entity_name="test_entity",
+            project_name="test_project",
+            filters=QueryFilter(trace_id="abc", status="error"),
+            limit=5,
+            columns=["id", "latency_ms"],
+        )
+        result = QueryBuilder.prepare_query_params(params)
+        assert result["project_id"] == "test_entity/test_project"
+        assert result["filter"] == {"trace_ids": ["abc"]}
+        assert "query" in result
+        assert result["limit"] == 5
+        assert result["columns"] == ["id", "summary"]
+        assert params.columns == ["id", "latency_ms"]
+
+        params.columns = ["summary", "status", "id", "latency_ms", "id"]
+        result = QueryBuilder.prepare_query_params(params)
+        assert result["columns"] == ["summary", "id"]
+        assert result["_synthetic_fields"] == ["status", "latency_ms"]
+
+    def test_prepare_query_params_skips_builder_for_simple_filters(self):
+        params = {"entity_name": "e", "project_name": "p", "filters": {"trace_roots_only": True, "call_ids": ["c1"]}}
+        with patch.object(QueryBuilder, "build_query_expression") as build:
+            result = QueryBuilder.prepare_query_params(params)
+        build.assert_not_called()
+        assert "query" not in result
+        assert QueryBuilder.build_query_expression({}) is None
+
+    def test_prepare_query_params_kw_matches_dict_form(self):
+        params = {
+            "entity_name": "e",
+            "project_name": "p",
+            "filters": {"op_name": "x", "status": "error"},
+            "sort_by": "started_at",
+            "limit": 3,
+            "offset": 0,
+            "columns": ["id", "status"],
+        }
+        legacy = QueryBuilder.prepare_query_params(params)
+        request_body, synthetic_fields = QueryBuilder.prepare_query_params_kw(**params)
+        assert synthetic_fields == legacy.pop("_synthetic_fields") == ["status"]
+        assert request_body == legacy
+
+        request_body, synthetic_fields = QueryBuilder.prepare_query_params_kw(entity_name="e", project_name="p")
+        assert request_body == {"project_id": "e/p", "include_costs": True, "include_feedback": True}
+        assert synthetic_fields == []
 
     def test_create_contains_operation(self):
         op = QueryBuilder.create_contains_operation("op_name", "test")
@@ -209,6 +286,73 @@ class TestQueryBuilder(unittest.TestCase):
         assert d["$contains"]["substr"]["$literal"] == "test"
         assert d["$contains"]["input"]["$getField"] == "op_name"
 
+    def test_wildcard_op_name_becomes_contains(self):
+        for pattern in ("*predict*", "predict.*"):
+            dumped = QueryBuilder.build_query_expression({"op_name": pattern}).model_dump(by_alias=True)
+            assert dumped["$expr"]["$contains"]["substr"]["$literal"] == pattern.replace("*", "")
+
+        dumped = QueryBuilder.build_query_expression({"display_name": "predict"}).model_dump(by_alias=True)
+        assert dumped["$expr"]["$eq"][1]["$literal"] == "predict"
+
+    def test_wb_run_id_contains_and_exact(self):
+        for run_id in ("$contains:abc", "abc*", "*abc*"):
+            dumped = QueryBuilder.build_query_expression({"wb_run_id": run_id}).model_dump(by_alias=True)
+            assert dumped["$expr"]["$contains"]["substr"]["$literal"] == "abc"
+
+        dumped = QueryBuilder.build_query_expression({"wb_run_id": "abc"}).model_dump(by_alias=True)
+        assert dumped["$expr"]["$eq"][1]["$literal"] == "abc"
+
+    def test_latency_and_attribute_operators(self):
+        dumped = QueryBuilder.build_query_expression({"latency": {"$gt": 500}}).model_dump(by_alias=True)
+        assert dumped["$expr"]["$gt"][0]["$getField"] == "summary.weave.latency_ms"
+        assert QueryBuilder.build_query_expression({"latency": {"$between": 500}}) is None
+
+        dumped = QueryBuilder.build_query_expression({"attributes": {"score": {"$gte": 0.5}}}).model_dump(by_alias=True)
+        assert "$gte" in dumped["$expr"]
+
+        # Unknown operators are skipped while valid siblings are still applied
+        dumped = QueryBuilder.build_query_expression({"inputs": {"n": {"$between": 1, "$lt": 3}}}).model_dump(
+            by_alias=True
+        )
+        assert dumped["$expr"]["$not"][0]["$gte"][0]["$getField"] == "inputs.n"
+
+    def test_handler_plan_cached_per_filter_shape(self):
+        QueryBuilder._handler_plan.cache_clear()
+        QueryBuilder.build_query_expression({"status": "error", "has_exception": True, "unknown": 1})
+        QueryBuilder.build_query_expression({"has_exception": False, "status": "running", "unknown": 2})
+        assert QueryBuilder._handler_plan.cache_info().hits == 1
+
+        plan = QueryBuilder._handler_plan(frozenset({"has_exception", "status", "unknown"}))
+        assert [key for key, _ in plan] == ["status", "has_exception"]
+
+    def test_status_filter_is_normalized(self):
+        for raw, expected in (("Error", "error"), ("RUNNING", "running"), ("Descendant_Error", "descendant_error")):
+            dumped = QueryBuilder.build_query_expression({"status": raw}).model_dump(by_alias=True)
+            assert dumped["$expr"]["$eq"][1] == {"$literal": expected}
+
+    def test_handler_order_override(self):
+        from wandb_mcp_server.weave_api.query_builder import _resolve_handler_order
+
+        default = ("time_range", "status", "op_name", "has_exception")
+        assert _resolve_handler_order(default, "") == default
+        assert _resolve_handler_order(default, " has_exception, bogus,status,has_exception") == (
+            "has_exception",
+            "status",
+            "time_range",
+            "op_name",
+        )
+
+    def test_comparison_rejects_malformed_container_values(self):
+        assert QueryBuilder.create_comparison_operation("inputs.x", FilterOperator.EQUALS, [1, 2]) is None
+        op = QueryBuilder.create_comparison_operation("inputs.x", FilterOperator.EQUALS, None)
+        assert op.model_dump(by_alias=True)["$eq"][1] == {"$literal": None}
+
+    def test_field_operators_are_shared(self):
+        first = QueryBuilder.create_comparison_operation("started_at", FilterOperator.GREATER_THAN, 1)
+        second = QueryBuilder.create_comparison_operation("started_at", FilterOperator.EQUALS, 2)
+        assert first.gt_[0] is second.eq_[0]
+        assert second.model_dump(by_alias=True)["$eq"][0] == {"$getField": "started_at"}
+
     def test_create_comparison_operation(self):
         eq_op = QueryBuilder.create_comparison_operation("field", FilterOperator.EQUALS, "value")
         assert eq_op.model_dump(by_alias=True)["$eq"][0]["$getField"] == "field"
@@ -306,6 +450,17 @@ class TestWeaveApiClient(unittest.TestCase):
         with pytest.raises(Exception, match="Error 400"):
             list(client.query_traces({"project_id": "entity/project"}))
 
+    @patch("requests.Session.post")
+    def test_count_traces(self, mock_post):
+        mock_post.return_value = Mock(status_code=200, json=Mock(return_value={"count": 42}))
+        client = WeaveApiClient(api_key="test_key")
+        assert client.count_traces({"project_id": "entity/project"}) == 42
+        assert mock_post.call_args.args[0].endswith("/calls/query_stats")
+
+        mock_post.return_value = Mock(status_code=500, text="oops")
+        with pytest.raises(Exception, match="Error 500"):
+            client.count_traces({"project_id": "entity/project"})
+
     @patch("requests.Session.post")
     def test_query_traces_network_error(self, mock_post):
         mock_post.side_effect = requests.RequestException("Network error")
@@ -339,5 +494,208 @@ class TestWeaveApiClient(unittest.TestCase):
         assert 404 not in adapter.max_retries.status_forcelist
 
 
+class TestTraceService(unittest.TestCase):
+    """Tests for the TraceService class."""
+
+    def setUp(self):
+        patcher = patch("wandb_mcp_server.weave_api.service.WeaveApiClient")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = TraceService(api_key="test_key", server_url="http://test")
+        # Large projects by default, so cost sorting takes the two-pass route
+        self.service.client.count_traces.return_value = 1_000_000
+        _TRACE_COUNT_CACHE.clear()
+        self.addCleanup(_TRACE_COUNT_CACHE.clear)
+
+    def test_column_validation_fast_path_for_plain_columns(self):
+        result = self.service._validate_and_filter_columns(["op_name", "id", "op_name"])
+        assert result == (["op_name", "id"], [], set())
+
+    def test_resolve_sort_field(self):
+        assert self.service._resolve_sort_field("started_at") == ("started_at", False)
+        assert self.service._resolve_sort_field("latency_ms") == ("summary.weave.latency_ms", False)
+        assert self.service._resolve_sort_field("total_cost") == ("started_at", True)
+        assert self.service._resolve_sort_field("summary.weave.status") == ("summary.weave.status", False)
+        assert self.service._resolve_sort_field("bogus.field") == ("started_at", False)
+        assert self.service._resolve_sort_field("bogus") == ("started_at", False)
+
+    def test_merge_synthetic_fields_keeps_order_without_duplicates(self):
+        from wandb_mcp_server.weave_api.service import _merge_synthetic_fields
+
+        flagged = ["status", "latency_ms"]
+        assert _merge_synthetic_fields(flagged, ["costs", "status", "costs"]) == ["status", "latency_ms", "costs"]
+        assert flagged == ["status", "latency_ms"]
+        assert _merge_synthetic_fields([], []) == []
+
+    def test_add_synthetic_columns_updates_traces_in_place(self):
+        traces = [{"id": "c1", "summary": {"weave": {"status": "error", "latency_ms": 12}}}]
+        result = self.service._add_synthetic_columns(traces, ["latency_ms"], {"bogus"}, ["status", "latency_ms"])
+        assert result is traces
+        assert traces[0]["latency_ms"] == 12
+        assert traces[0]["status"] == "error"
+        assert traces[0]["bogus"] == "bogus is not a valid column name, no data returned"
+
+    def test_add_synthetic_columns_tolerates_missing_summary(self):
+        traces = [{"id": "c1", "summary": None}, {"id": "c2"}]
+        self.service._add_synthetic_columns(traces, {"costs", "status", "latency_ms"}, set())
+        for trace in traces:
+            assert trace["costs"] == {}
+            assert trace["status"] is None
+            assert trace["latency_ms"] is None
+
+    def test_add_synthetic_columns_warns_once_per_batch(self):
+        traces = [{"id": f"c{i}"} for i in range(10)]
+        with self.assertLogs("wandb_mcp_server.weave_api.service", level="WARNING") as logs:
+            self.service._add_synthetic_columns(traces, ["costs", "status"], set())
+        assert len(logs.records) == 2
+        assert "No costs data found in 10 of 10 traces" in logs.output[0]
+        assert "No status data found in 10 of 10 traces" in logs.output[1]
+
+    def test_add_synthetic_columns_skips_summary_when_fields_present(self):
+        class ExplodingSummary(dict):
+            def get(self, *args, **kwargs):
+                raise AssertionError("summary should not be read")
+
+        traces = [{"id": "c1", "status": "success", "latency_ms": 5, "summary": ExplodingSummary()}]
+        self.service._add_synthetic_columns(traces, ["status", "latency_ms"], set())
+        assert traces[0]["status"] == "success"
+        assert traces[0]["latency_ms"] == 5
+
+    def test_cost_sort_first_pass_limit_scales_with_target(self):
+        assert self.service._cost_sort_first_pass_limit(None) == TraceService.COST_SORT_MAX_FIRST_PASS
+        assert self.service._cost_sort_first_pass_limit(10) == 5_000
+        assert self.service._cost_sort_first_pass_limit(700) == 7_000
+        assert self.service._cost_sort_first_pass_limit(5_000) == TraceService.COST_SORT_MAX_FIRST_PASS
+
+        self.service.client.query_traces.side_effect = lambda body: iter([])
+        self.service._query_for_cost_sorting("e", "p", target_limit=10)
+        first_pass_body = self.service.client.query_traces.call_args_list[0].args[0]
+        assert first_pass_body["limit"] == 5_000
+
+    def test_stream_top_ids_by_cost_keeps_stable_order(self):
+        from wandb_mcp_server.weave_api.service import _stream_top_ids_by_cost
+
+        costs = [1.0, 3.0, 1.0, 2.0, 3.0]
+        traces = ({"id": f"c{i}", "costs": {"m": {"total_cost": cost}}} for i, cost in enumerate(costs))
+        assert _stream_top_ids_by_cost(traces, "total_cost", "desc", 3) == (["c1", "c4", "c3"], 5)
+
+        traces = [{"id": f"c{i}", "costs": {"m": {"total_cost": cost}}} for i, cost in enumerate(costs)]
+        assert _stream_top_ids_by_cost(iter(traces), "total_cost", "asc", None) == (["c0", "c2", "c3", "c1", "c4"], 5)
+        assert _stream_top_ids_by_cost(iter([]), "total_cost", "desc", 3) == ([], 0)
+
+    def test_order_by_ids_matches_requested_order(self):
+        from wandb_mcp_server.weave_api.service import _order_by_ids
+
+        in_order = [{"id": "a"}, {"id": "b"}]
+        assert _order_by_ids(in_order, ["a", "b"]) is in_order
+
+        traces = [{"id": "x"}, {"id": "b", "n": 1}, {"id": "a"}, {"id": "b", "n": 2}]
+        assert _order_by_ids(traces, ["a", "b"]) == [{"id": "a"}, {"id": "b", "n": 1}, {"id": "b", "n": 2}, {"id": "x"}]
+
+    def test_cost_sort_second_pass_adds_summary_without_mutating_columns(self):
+        trace = {"id": "c1", "summary": {"weave": {"costs": {"m": {"total_cost": 1.0}}}}}
+        self.service.client.query_traces.side_effect = lambda body: iter([trace])
+        columns = ["id"]
+        self.service._query_for_cost_sorting(
+            "e", "p", target_limit=1, columns=columns, requested_synthetic_columns=["costs"]
+        )
+        second_pass_body = self.service.client.query_traces.call_args_list[1].args[0]
+        assert second_pass_body["columns"] == ["id", "summary"]
+        assert columns == ["id"]
+
+    def test_cost_sort_fetches_small_projects_in_one_pass(self):
+        traces = [{"id": f"c{i}", "summary": {"weave": {"costs": {"m": {"total_cost": i % 3}}}}} for i in range(4)]
+        self.service.client.count_traces.return_value = 4
+        self.service.client.query_traces.side_effect = lambda body: iter(traces)
+
+        result = self.service._query_for_cost_sorting("e", "p", target_limit=5)
+        assert [t["id"] for t in result] == ["c2", "c1", "c0", "c3"]
+        assert self.service.client.query_traces.call_count == 1
+
+        self.service._query_for_cost_sorting("e", "p", target_limit=5)
+        assert self.service.client.count_traces.call_count == 1
+
+    def test_cost_sort_single_pass_is_not_capped_by_first_pass_limit(self):
+        self.service.client.count_traces.return_value = 15_000
+        self.service.client.query_traces.side_effect = lambda body: iter([])
+
+        self.service._query_for_cost_sorting("e", "p", target_limit=20_000)
+        body = self.service.client.query_traces.call_args.args[0]
+        assert body["limit"] == 20_000
+        assert body["sort_by"] == [{"field": "started_at", "direction": "desc"}]
+
+    def test_cost_sort_count_failure_falls_back_to_two_passes(self):
+        self.service.client.count_traces.side_effect = Exception("boom")
+        self.service.client.query_traces.side_effect = lambda body: iter([])
+        assert self.service._query_for_cost_sorting("e", "p", target_limit=5) == []
+        assert self.service.client.query_traces.call_args.args[0]["columns"] == ["id", "summary.weave.costs"]
+
+    def test_cost_sort_second_pass_fetches_ids_in_chunks(self):
+        traces = {
+            f"c{i}": {"id": f"c{i}", "summary": {"weave": {"costs": {"m": {"total_cost": i}}}}} for i in range(250)
+        }
+
+        def fake_query(body):
+            call_ids = body.get("filter", {}).get("call_ids")
+            if call_ids is None:
+                return iter(traces.values())
+            return iter([traces[call_id] for call_id in reversed(call_ids)])
+
+        self.service.client.query_traces.side_effect = fake_query
+        result = self.service._query_for_cost_sorting("e", "p", target_limit=250, columns=["id", "summary"])
+
+        chunk_sizes = sorted(
+            len(call.args[0]["filter"]["call_ids"])
+            for call in self.service.client.query_traces.call_args_list
+            if "filter" in call.args[0]
+        )
+        assert chunk_sizes == [50, 100, 100]
+        # Chunks come back reversed, but results follow the cost order picked by the first pass
+        assert [t["id"] for t in result] == [f"c{i}" for i in range(249, -1, -1)]
+
+    def test_client_side_cost_sort_keeps_top_traces_in_order(self):
+        costs = [0.5, 2.0, 0.5, 3.0, 1.0]
+        traces = [
+            {"id": f"c{i}", "summary": {"weave": {"costs": {"m": {"total_cost": cost}}}}}
+            for i, cost in enumerate(costs)
+        ]
+        self.service.client.query_traces.side_effect = lambda body: iter(traces)
+
+        result = self.service.query_traces(
+            "e", "p", sort_by="total_cost", limit=3, columns=["costs"], return_full_data=True
+        )
+        assert [t["id"] for t in result.traces] == ["c3", "c1", "c4"]
+
+        result = self.service.query_traces(
+            "e", "p", sort_by="total_cost", sort_direction="asc", limit=2, columns=["costs"], return_full_data=True
+        )
+        assert [t["id"] for t in result.traces] == ["c0", "c2"]
+
+    def test_paginated_query_streams_a_single_request(self):
+        traces = [{"id": f"c{i}", "summary": {"weave": {"status": "success", "latency_ms": i}}} for i in range(7)]
+        bodies = []
+        consumed = []
+
+        def fake_query(body):
+            bodies.append((body["offset"], body.get("limit")))
+            for trace in traces:
+                consumed.append(trace["id"])
+                yield trace
+
+        self.service.client.query_traces.side_effect = fake_query
+        result = self.service.query_paginated_traces(
+            "entity", "project", columns=["id", "latency_ms"], return_full_data=True
+        )
+        assert bodies == [(0, None)]
+        assert [t["latency_ms"] for t in result.traces] == list(range(7))
+
+        bodies.clear()
+        consumed.clear()
+        result = self.service.query_paginated_traces("entity", "project", target_limit=4, return_full_data=True)
+        assert bodies == [(0, 4)]
+        assert consumed == ["c0", "c1", "c2", "c3"]
+        assert [t["id"] for t in result.traces] == ["c0", "c1", "c2", "c3"]
+
+
 if __name__ == "__main__":
     unittest.main()